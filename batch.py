@@ -0,0 +1,240 @@
+# Headless batch report generator: render every (Course Name, Country) pair
+# from the three workbooks in parallel and write DOCX/HTML to a ZIP or a directory.
+#
+# Usage:
+#   python batch.py COURSE.xlsx COLLECTION.xlsx DETAILS.xlsx --zip reports.zip
+#   python batch.py COURSE.xlsx COLLECTION.xlsx DETAILS.xlsx --out-dir reports/ --course MBA --format html
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import ingest
+import selection
+import collection_store
+import gyandhantemp
+import html_report
+
+FORMATS = ("docx", "html")
+
+# Staged files are copied into the ZIP archive in pieces of this size
+COPY_CHUNK_BYTES = 1024 * 1024
+
+# Dataset shared by every worker process, set once by the pool initializer
+_dataset = None
+
+
+# Function to print a validation warning (a problem that leaves something out of the reports)
+def warn(message):
+    print(f"warning: {message}", file=sys.stderr)
+
+
+# Function to load and validate the three workbooks once in the parent process
+#
+# Skipped collection sheets are reported on stderr; invalid Course Details or University
+# Details files stop the run with the problems found.
+def load_dataset(course_file, collection_file, details_file, course_sheet=0):
+    try:
+        course_details, _ = gyandhantemp.load_course_details(course_file, course_sheet)
+    except ingest.SchemaError as e:
+        raise SystemExit(f"Course Details: {e}")
+
+    collection_data_list = gyandhantemp.load_collection_data(collection_file, warn=warn)
+    if not collection_data_list:
+        raise SystemExit(f"Collection file '{collection_file}' has no valid collection sheets")
+    errors = []
+    tuition_fees_data, living_expenses_data, deadlines_data = gyandhantemp.read_third_excel_file(details_file, error=errors.append)
+    if tuition_fees_data is None:
+        raise SystemExit(f"University Details file '{details_file}': {' '.join(errors)}")
+
+    # Chart problems only matter with --charts, so they are kept for main() to report
+    graph_errors = []
+    graph_data = gyandhantemp.generate_graph_data(course_details, error=graph_errors.append)
+
+    return {
+        "course_details": course_details,
+        "selection_index": selection.SelectionIndex(course_details, gyandhantemp.COURSE_SELECTION_COLUMNS),
+        "graph_data": graph_data,
+        "graph_errors": graph_errors,
+        "collection_data_list": collection_data_list,
+        "collection_store": collection_store.CollectionStore(collection_data_list),
+        "include_all_collections": False,
+        "tuition_fees_data": tuition_fees_data,
+        "living_expenses_data": living_expenses_data,
+        "deadlines_data": deadlines_data,
+        "details_key": ingest.workbook_digest(details_file),
+        "graph_images": [],
+        "output_names": {},
+    }
+
+
+# Function to list the (Course Name, Country) pairs to render, optionally filtered
+def select_pairs(selection_index, courses=None, countries=None):
+    pairs = []
+    for course_name in selection_index.options('Course Name'):
+        if courses and course_name not in courses:
+            continue
+        for country in selection_index.options('Country', {'Course Name': course_name}):
+            if not countries or country in countries:
+                pairs.append((course_name, country))
+    return pairs
+
+
+# Function to build a filesystem-safe base name for a pair
+def output_name(course_name, country):
+    return re.sub(r'[^\w.-]+', '_', f"{course_name}_{country}").strip('_')
+
+
+# Function to give every pair a distinct base name: pairs whose names sanitize to the same
+# string (e.g. "MS (CS)" and "MS CS") get a numeric suffix instead of overwriting each other
+def output_names(pairs):
+    names = {}
+    used = set()
+    for pair in pairs:
+        base = name = output_name(*pair)
+        suffix = 1
+        while name in used:
+            suffix += 1
+            name = f"{base}_{suffix}"
+        used.add(name)
+        names[pair] = name
+    return names
+
+
+def _init_worker(dataset):
+    global _dataset
+    _dataset = dataset
+
+
+# Function to render one pair into `out_dir`, returning the names of the files written; runs
+# inside a worker process. Pages are written to disk as they are generated, so neither the
+# worker nor the parent ever holds a whole HTML page in memory
+def render_pair(pair, out_dir, formats=FORMATS):
+    course_name, country = pair
+    data = _dataset
+    if data["include_all_collections"]:
+        collections = data["collection_data_list"]
+    else:
+        collections = data["collection_store"].select(data["collection_data_list"], course_name, country)
+    report = gyandhantemp.build_report(
+        data["course_details"],
+        collections,
+        course_name,
+        country,
+        data["tuition_fees_data"],
+        data["living_expenses_data"],
+        data["deadlines_data"],
+        data["selection_index"],
+        data["details_key"]
+    )
+    if report is None:
+        return []
+
+    name = data["output_names"].get(pair) or output_name(course_name, country)
+    files = []
+    if "docx" in formats:
+        content = gyandhantemp.render_markdown(report)
+        word_file = gyandhantemp.generate_word_with_images(content, collections, data["graph_images"])
+        files.append(f"{name}_complete_with_rankings.docx")
+        with open(os.path.join(out_dir, files[-1]), "wb") as f:
+            f.write(word_file.getbuffer())
+    if "html" in formats:
+        files.append(f"{name}_complete_content.html")
+        with open(os.path.join(out_dir, files[-1]), "wb") as f:
+            gyandhantemp.write_html(f, report, data["graph_images"])
+    return files
+
+
+# Function to render all pairs across a process pool, yielding results in input order
+def render_all(dataset, pairs, out_dir, formats=FORMATS, workers=None):
+    if workers == 1:
+        _init_worker(dataset)
+        for pair in pairs:
+            yield pair, render_pair(pair, out_dir, formats)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(pairs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(dataset,)) as pool:
+        results = pool.map(render_pair, pairs, [out_dir] * len(pairs), [formats] * len(pairs), chunksize=chunksize)
+        yield from zip(pairs, results)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Render course/country reports for every pair in the workbooks.")
+    parser.add_argument("course_file", help="Course Details workbook")
+    parser.add_argument("collection_file", help="Collection workbook")
+    parser.add_argument("details_file", help="University Details workbook")
+    parser.add_argument("--course-sheet", default=0, help="Sheet of the Course Details workbook to load (default: first)")
+    parser.add_argument("--course", action="append", help="Only render this Course Name (repeatable)")
+    parser.add_argument("--country", action="append", help="Only render this Country (repeatable)")
+    parser.add_argument("--format", action="append", choices=FORMATS, help="Output format (repeatable, default: all)")
+    parser.add_argument("--all-collections", action="store_true",
+                        help="Put every collection row in each report, not only the rows of its course and country")
+    parser.add_argument("--charts", action="store_true", help="Embed the tuition charts (rendered once, needs kaleido)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument("--zip", help="Write all outputs into this ZIP file ('-' for stdout)")
+    output.add_argument("--out-dir", help="Write all outputs into this directory")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    formats = tuple(args.format or FORMATS)
+    course_sheet = int(args.course_sheet) if str(args.course_sheet).isdigit() else args.course_sheet
+
+    dataset = load_dataset(args.course_file, args.collection_file, args.details_file, course_sheet)
+    dataset["include_all_collections"] = args.all_collections
+    if args.charts and dataset["graph_data"].empty:
+        for message in dataset["graph_errors"]:
+            warn(f"charts left out: {message}")
+    elif args.charts:
+        # The charts cover the whole course sheet, so they are rasterized once and shared by every page
+        figures = gyandhantemp.build_graph_figures(dataset["graph_data"])
+        try:
+            dataset["graph_images"] = [gyandhantemp.plotly_fig_to_image(fig) for fig in figures]
+        except RuntimeError as e:
+            raise SystemExit(f"--charts: the charts could not be rendered: {e}")
+    if "html" in formats:
+        # Compiled once here, so forked workers inherit the templates instead of each compiling them
+        html_report.environment()
+    pairs = select_pairs(dataset["selection_index"], args.course, args.country)
+    if not pairs:
+        print("No (Course Name, Country) pairs match the given filters.", file=sys.stderr)
+        return 1
+    dataset["output_names"] = output_names(pairs)
+
+    start = time.perf_counter()
+    pages = 0
+    if args.zip:
+        target = sys.stdout.buffer if args.zip == "-" else args.zip
+        # Workers write into a staging directory; each file is copied into the archive in chunks
+        # as soon as its result arrives, then removed, so the archive is streamed
+        with tempfile.TemporaryDirectory(prefix="gyandhan-batch-") as staging, \
+                zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for _, files in render_all(dataset, pairs, staging, formats, args.workers):
+                for file_name in files:
+                    path = os.path.join(staging, file_name)
+                    with open(path, "rb") as source, archive.open(file_name, "w") as entry:
+                        shutil.copyfileobj(source, entry, COPY_CHUNK_BYTES)
+                    os.remove(path)
+                pages += bool(files)
+    else:
+        os.makedirs(args.out_dir, exist_ok=True)
+        for _, files in render_all(dataset, pairs, args.out_dir, formats, args.workers):
+            pages += bool(files)
+
+    elapsed = time.perf_counter() - start
+    rate = pages / elapsed if elapsed else 0.0
+    print(f"Rendered {pages}/{len(pairs)} pages in {elapsed:.2f}s ({rate:.2f} pages/sec)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
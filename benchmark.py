@@ -0,0 +1,345 @@
+# Benchmark harness: generates synthetic workbooks at a configurable scale, times every
+# pipeline stage of both apps and writes the results as JSON so runs can be compared.
+#
+# Usage:
+#   python benchmark.py --rows 5000 --sheets 3 --output bench.json
+#   python benchmark.py --rows 50000 --collection-rows 20000 --columns 20 --repeat 5
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import ingest
+import sections
+import gyandhan
+import gyandhantemp
+
+COURSES = ['MBA', 'MS Computer Science', 'MS Data Science', 'Masters in Management', 'MEng Mechanical']
+COUNTRIES = ['USA', 'UK', 'Canada', 'Germany', 'Australia', 'Ireland']
+COLLEGES = [f'College {i}' for i in range(200)]
+STREAMS = ['Business', 'Engineering', 'Science']
+AGENCIES = ['QS', 'THE', 'ARWU']
+
+
+# Function to add `count` filler text columns to a synthetic sheet
+def _filler_columns(df, count, rng):
+    for i in range(count):
+        df[f'Extra {i}'] = rng.choice(['alpha', 'beta', 'gamma', None], len(df))
+    return df
+
+
+# Function to write the Course Details workbook
+def make_course_workbook(path, rows, columns=0, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Course Name': rng.choice(COURSES, rows),
+        'Country': rng.choice(COUNTRIES, rows),
+        'University Name': [f'University {i}' for i in range(rows)],
+        'Tuition Fees (INR)': rng.integers(500000, 6000000, rows),
+        'Living Expenses (INR)': rng.integers(300000, 2500000, rows),
+        'Acceptance Rate (%)': rng.uniform(5, 90, rows).round(1),
+        'Top Specializations': 'Finance, Marketing, Analytics',
+        'Relevant YouTube Video URL': 'https://www.youtube.com/watch?v=example',
+        'Top Employers': 'Google, Amazon, Deloitte',
+        'Median Salary (USD)': rng.integers(50000, 160000, rows),
+    })
+    _filler_columns(df, columns, rng).to_excel(path, index=False)
+
+
+# Function to write the Collection workbook with `sheets` collection sheets
+def make_collection_workbook(path, rows, sheets=3, columns=0, seed=1):
+    rng = np.random.default_rng(seed)
+    with pd.ExcelWriter(path) as writer:
+        for sheet in range(sheets):
+            ranking = rng.integers(1, 1000, rows).astype(float)
+            ranking[rng.random(rows) < 0.1] = np.nan
+            df = pd.DataFrame({
+                'Course Name': rng.choice(COURSES, rows),
+                'Country': rng.choice(COUNTRIES, rows),
+                'Collection Name': f'Collection {sheet}',
+                'University Name': [f'University {i}' for i in range(rows)],
+                'Tuition Fees': rng.integers(500000, 6000000, rows),
+                'Acceptance Rate': rng.uniform(5, 90, rows).round(1),
+                'Application Link': [f'https://university{i}.example.edu/apply' for i in range(rows)],
+                'Ranking': ranking,
+                'Agency Name': rng.choice(AGENCIES, rows),
+                'Stream': rng.choice(STREAMS, rows),
+            })
+            _filler_columns(df, columns, rng).to_excel(writer, sheet_name=f'Collection {sheet}', index=False)
+
+
+# Function to write the University Details workbook
+def make_details_workbook(path, rows, seed=2):
+    rng = np.random.default_rng(seed)
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({
+            'University Name': [f'University {i}' for i in range(rows)],
+            'Tuition Fees (INR)': rng.integers(500000, 6000000, rows),
+        }).to_excel(writer, sheet_name='Tuition Fees', index=False)
+        pd.DataFrame({
+            'Item': rng.choice(['Rent', 'Food', 'Transport', 'Insurance'], rows),
+            'Monthly Cost (INR)': rng.integers(5000, 90000, rows),
+        }).to_excel(writer, sheet_name='Living Expenses', index=False)
+        pd.DataFrame({
+            'Event': [f'Deadline {i}' for i in range(min(rows, 50))],
+            'Date': pd.date_range('2025-01-01', periods=min(rows, 50), freq='W'),
+            'Notes': 'Apply early',
+        }).to_excel(writer, sheet_name='Important Deadlines', index=False)
+
+
+# Function to write the workbook used by the college/course filter app
+def make_filter_workbook(path, rows, columns=0, seed=3):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'ID': np.arange(rows),
+        'college': rng.choice(COLLEGES, rows),
+        'Course_name': rng.choice(COURSES, rows),
+        'Course_link': 'https://example.edu/course',
+        'Fees': rng.integers(1000, 90000, rows),
+        'Duration': rng.integers(1, 5, rows),
+        'TOEFL': rng.integers(70, 120, rows),
+        'IELTS': rng.uniform(5.5, 8.5, rows).round(1),
+        'PTE': rng.integers(50, 90, rows),
+    })
+    _filler_columns(df, columns, rng).to_excel(path, index=False)
+
+
+# Function to generate all synthetic workbooks into a directory
+def make_workbooks(directory, rows, collection_rows, sheets, columns):
+    paths = {
+        'course': os.path.join(directory, 'course_details.xlsx'),
+        'collection': os.path.join(directory, 'collections.xlsx'),
+        'details': os.path.join(directory, 'university_details.xlsx'),
+        'filter': os.path.join(directory, 'filter_data.xlsx'),
+    }
+    make_course_workbook(paths['course'], rows, columns)
+    make_collection_workbook(paths['collection'], collection_rows, sheets, columns)
+    make_details_workbook(paths['details'], max(rows // 10, 10))
+    make_filter_workbook(paths['filter'], rows, columns)
+    return paths
+
+
+# Function to reduce repeated timings to min/median/mean
+def summarize(timings):
+    return {
+        "runs": len(timings),
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "mean_s": statistics.fmean(timings),
+    }
+
+
+# Function to time a stage `repeat` times; `setup` runs untimed before each repetition
+def time_stage(results, name, fn, repeat, setup=None):
+    timings = []
+    value = None
+    try:
+        for _ in range(repeat):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            value = fn()
+            timings.append(time.perf_counter() - start)
+    except Exception as e:  # noqa: BLE001 - a failing stage is recorded, not fatal
+        results[name] = {"error": f"{type(e).__name__}: {str(e).strip()}"}
+        print(f"{name:<32} {type(e).__name__}", file=sys.stderr)
+        return None
+    results[name] = summarize(timings)
+    print(f"{name:<32} {results[name]['median_s']:.4f}s", file=sys.stderr)
+    return value
+
+
+# Modules whose cold import time is tracked: both apps, Streamlit itself, and the heavy
+# dependencies the apps defer until a feature needs them
+STARTUP_MODULES = ['gyandhan', 'gyandhantemp', 'streamlit', 'pandas', 'pyarrow.parquet', 'openpyxl',
+                   'docx', 'plotly.express', 'matplotlib.figure', 'kaleido']
+HEAVY_MODULES = ['pandas', 'numpy', 'pyarrow', 'openpyxl', 'docx', 'plotly.express', 'matplotlib', 'kaleido']
+
+# Imports one module in a fresh interpreter and reports the time and which heavy modules came along
+_IMPORT_PROBE = """
+import importlib, json, sys, time
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [name for name in sys.argv[2:] if name in sys.modules]}))
+"""
+
+
+# Function to time the cold import of each startup module, each in its own interpreter
+def startup_times(repeat):
+    results = {}
+    here = os.path.dirname(os.path.abspath(__file__))
+    for module in STARTUP_MODULES:
+        timings = []
+        try:
+            for _ in range(repeat):
+                probe = subprocess.run([sys.executable, "-c", _IMPORT_PROBE, module, *HEAVY_MODULES],
+                                       capture_output=True, text=True, cwd=here, check=True)
+                result = json.loads(probe.stdout.strip().splitlines()[-1])
+                timings.append(result["seconds"])
+        except subprocess.CalledProcessError as e:
+            lines = e.stderr.strip().splitlines()
+            results[module] = {"error": lines[-1] if lines else f"exit status {e.returncode}"}
+            print(f"import {module:<25} {results[module]['error']}", file=sys.stderr)
+            continue
+        results[module] = dict(summarize(timings), loaded=result["loaded"])
+        print(f"import {module:<25} {results[module]['median_s']:.4f}s", file=sys.stderr)
+    return results
+
+
+# Function to get the current git revision, so results can be tied to a version
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(paths, repeat):
+    results = {}
+    cache = ingest.workbook_cache
+
+    def cold():
+        # Drop both the in-memory entries and the on-disk snapshots
+        cache.clear()
+        shutil.rmtree(cache.cache_dir, ignore_errors=True)
+
+    # Ingestion
+    time_stage(results, "list_excel_sheets.cold", lambda: gyandhantemp.list_excel_sheets(paths['collection']), repeat, cold)
+    time_stage(results, "list_excel_sheets.warm", lambda: gyandhantemp.list_excel_sheets(paths['collection']), repeat)
+    time_stage(results, "read_third_excel_file.cold", lambda: gyandhantemp.read_third_excel_file(paths['details']), repeat, cold)
+    details = time_stage(results, "read_third_excel_file.warm", lambda: gyandhantemp.read_third_excel_file(paths['details']), repeat)
+    time_stage(results, "load_collection_data.cold", lambda: gyandhantemp.load_collection_data(paths['collection']), repeat, cold)
+    collection_data_list = time_stage(results, "load_collection_data.warm", lambda: gyandhantemp.load_collection_data(paths['collection']), repeat)
+    course_details = time_stage(results, "read_course_details", lambda: ingest.read_sheet(
+        paths['course'], columns=gyandhantemp.COURSE_COLUMNS, required=gyandhantemp.COURSE_REQUIRED_COLUMNS), repeat)
+    filter_df = time_stage(results, "read_filter_workbook", lambda: gyandhan.convert_to_numeric(
+        ingest.read_sheet(paths['filter'], exclude=['ID', 'Course_link']), ['Fees', 'Duration', 'TOEFL', 'IELTS', 'PTE']), repeat)
+    if details is None or collection_data_list is None or course_details is None or filter_df is None:
+        return results
+    tuition_fees_data, living_expenses_data, deadlines_data = details
+    details_key = ingest.workbook_digest(paths['details'])
+
+    # Filtering
+    index = time_stage(results, "selection_index.build", lambda: gyandhan.selection.SelectionIndex(filter_df, ['college', 'Course_name']), repeat)
+    college, course = filter_df['college'].iloc[0], filter_df['Course_name'].iloc[0]
+    time_stage(results, "filter_data.scan", lambda: gyandhan.filter_data(filter_df, college=college), repeat)
+    time_stage(results, "filter_data.indexed", lambda: gyandhan.filter_data(filter_df, college=college, index=index), repeat)
+    time_stage(results, "filter_data.indexed_pair", lambda: gyandhan.filter_data(filter_df, college=college, course=course, index=index), repeat)
+    filtered = time_stage(results, "filter_data.all_rows", lambda: gyandhan.filter_data(filter_df), 1)
+    rows = time_stage(results, "select_rows.all_rows", lambda: gyandhan.select_rows(filter_df, index=index), repeat)
+    if rows is not None:
+        time_stage(results, "transpose_rows.page", lambda: gyandhan.transpose_rows(rows.iloc[:gyandhan.RESULT_PAGE_SIZE]), repeat)
+
+    # Content rendering
+    course_index = gyandhantemp.selection.SelectionIndex(course_details, gyandhantemp.COURSE_SELECTION_COLUMNS)
+    course_name = course_index.options('Course Name')[0]
+    country = course_index.options('Country', {'Course Name': course_name})[0]
+    graph_data = gyandhantemp.generate_graph_data(course_details)
+
+    def render():
+        return gyandhantemp.generate_final_content(
+            course_details, graph_data, collection_data_list, course_name, country,
+            tuition_fees_data, living_expenses_data, deadlines_data, course_index, details_key)
+
+    content = time_stage(results, "generate_final_content.cold", render, repeat, sections.section_cache.clear)
+    time_stage(results, "generate_final_content.warm", render, repeat)
+
+    # DOCX
+    time_stage(results, "df_to_word", lambda: gyandhan.df_to_word(filtered), repeat)
+    time_stage(results, "generate_word_with_images.cold",
+               lambda: gyandhantemp.generate_word_with_images(content, collection_data_list, []), repeat, sections.section_cache.clear)
+    time_stage(results, "generate_word_with_images.warm",
+               lambda: gyandhantemp.generate_word_with_images(content, collection_data_list, []), repeat)
+
+    # HTML (the first run also compiles the templates)
+    report = gyandhantemp.build_report(
+        course_details, collection_data_list, course_name, country,
+        tuition_fees_data, living_expenses_data, deadlines_data, course_index, details_key)
+    time_stage(results, "generate_html", lambda: gyandhantemp.generate_html(report, []), repeat)
+
+    # Chart export (needs a browser for kaleido; recorded as an error otherwise)
+    figures = gyandhantemp.build_graph_figures(graph_data)
+    time_stage(results, "chart_export", lambda: [gyandhantemp.plotly_fig_to_image(fig) for fig in figures], 1)
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on synthetic workbooks.")
+    parser.add_argument("--rows", type=int, default=2000, help="Rows in the course details and filter workbooks")
+    parser.add_argument("--collection-rows", type=int, default=None, help="Rows per collection sheet (default: --rows)")
+    parser.add_argument("--sheets", type=int, default=3, help="Number of collection sheets")
+    parser.add_argument("--columns", type=int, default=0, help="Extra filler columns per sheet")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per stage")
+    parser.add_argument("--workdir", default=None, help="Keep the generated workbooks in this directory")
+    parser.add_argument("--startup-only", action="store_true", help="Only measure cold import times")
+    parser.add_argument("--output", default="-", help="JSON results file ('-' for stdout)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    collection_rows = args.collection_rows or args.rows
+    startup = startup_times(args.repeat)
+
+    workdir = None
+    paths = {}
+    generate_s = None
+    stages = {}
+    if not args.startup_only:
+        workdir = args.workdir or tempfile.mkdtemp(prefix="gyandhan-bench-")
+        os.makedirs(workdir, exist_ok=True)
+
+        # Keep benchmark snapshots away from the app's cache directory
+        ingest.workbook_cache.cache_dir = os.path.join(workdir, "cache")
+
+        start = time.perf_counter()
+        paths = make_workbooks(workdir, args.rows, collection_rows, args.sheets, args.columns)
+        generate_s = time.perf_counter() - start
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            stages = run(paths, args.repeat)
+
+    report = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "params": {
+            "rows": args.rows,
+            "collection_rows": collection_rows,
+            "sheets": args.sheets,
+            "columns": args.columns,
+            "repeat": args.repeat,
+        },
+        "workbook_bytes": {name: os.path.getsize(path) for name, path in paths.items()},
+        "generate_workbooks_s": generate_s,
+        "startup": startup,
+        "stages": stages,
+    }
+    output = json.dumps(report, indent=2, default=str)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+    if workdir and not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+# Chart rasterization service: Plotly figures are rendered to PNG bytes in memory by a
+# kept-warm kaleido renderer and cached by a hash of the figure data, so reruns and
+# concurrent sessions share images instead of rewriting files under /tmp.
+# Plotly and kaleido are only imported once a chart is first rendered.
+import atexit
+import hashlib
+import os
+import threading
+
+import lru
+
+CHART_CACHE_MAX_BYTES = int(os.environ.get("GYANDHAN_CHART_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+_renderer_lock = threading.Lock()
+_renderer_started = False
+
+
+# Function to check that kaleido will find a browser to render with
+def _browser_available():
+    if os.environ.get("BROWSER_PATH"):
+        return True
+    try:
+        from choreographer.browsers.chromium import Chromium
+    except ImportError:
+        return True
+    return Chromium.find_browser(skip_local=False) is not None
+
+
+# Function to start the kaleido browser once per process and keep it warm for later renders
+def start_renderer():
+    global _renderer_started
+    with _renderer_lock:
+        if _renderer_started:
+            return
+        _renderer_started = True
+        # Without a browser the persistent server dies silently and renders would hang;
+        # plain pio.to_image calls raise a clear RuntimeError instead
+        if not _browser_available():
+            return
+        try:
+            import kaleido
+            kaleido.start_sync_server(silence_warnings=True)
+        except (ImportError, AttributeError):
+            # Older kaleido releases have no persistent server; each render starts its own
+            return
+        atexit.register(kaleido.stop_sync_server, silence_warnings=True)
+
+
+chart_cache = lru.BoundedCache(CHART_CACHE_MAX_BYTES)
+
+
+# Function to hash everything that affects a figure's pixels
+def figure_key(fig, image_format="png", width=None, height=None, scale=None):
+    import plotly.io as pio
+    digest = hashlib.sha256(pio.to_json(fig, validate=False).encode())
+    digest.update(repr((image_format, width, height, scale)).encode())
+    return digest.hexdigest()
+
+
+# Function to rasterize a figure to image bytes, served from the cache when already rendered
+def figure_image(fig, image_format="png", width=None, height=None, scale=None):
+    key = figure_key(fig, image_format, width, height, scale)
+    image = chart_cache.get(key)
+    if image is None:
+        start_renderer()
+        import plotly.io as pio
+        image = pio.to_image(fig, format=image_format, width=width, height=height, scale=scale)
+        chart_cache.put(key, image)
+    return image
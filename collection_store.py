@@ -0,0 +1,89 @@
+# Indexed collection store: the (Course Name, Country) keys of every collection sheet are
+# concatenated once and indexed by (Course Name, Country, sheet), so a report pulls only the
+# rows matching its selection through a keyed lookup instead of dumping every sheet whole.
+# A store holds only that index, never the frames (or the registry handles that pin them):
+# rows are sliced from the caller's own collections, so cached stores don't keep datasets alive.
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import selection
+
+KEY_COLUMNS = ['Course Name', 'Country']
+INDEX_COLUMNS = KEY_COLUMNS + ['Sheet']
+
+# How many stores are kept around for reuse across reruns
+STORE_CACHE_SIZE = 16
+
+
+# Function to drop repeated sheet names; later sheets with the same name replace earlier ones,
+# as in the reports
+def unique_collections(collection_data_list):
+    return list({data["sheet_name"]: data for data in collection_data_list}.values())
+
+
+class CollectionStore:
+    def __init__(self, collection_data_list):
+        collections = unique_collections(collection_data_list)
+        self.sheet_names = [data["sheet_name"] for data in collections]
+
+        # Only the key columns are concatenated; rows are sliced from each sheet's own frame,
+        # so sliced tables keep their sheet's dtypes and render exactly as before
+        keys = [data["data"][KEY_COLUMNS].astype(object).assign(Sheet=sheet)
+                for sheet, data in enumerate(collections)]
+        if keys:
+            frame = pd.concat(keys, ignore_index=True)
+            self._positions = np.concatenate([np.arange(len(data["data"])) for data in collections])
+        else:
+            frame = pd.DataFrame(columns=INDEX_COLUMNS)
+            self._positions = np.array([], dtype=np.intp)
+        self.index = selection.SelectionIndex(frame, INDEX_COLUMNS)
+
+    # Function to get the row positions of one sheet matching a course and country
+    def rows(self, course_name, country, sheet):
+        return self._positions[self.index.rows({'Course Name': course_name, 'Country': country, 'Sheet': sheet})]
+
+    # Function to slice the collections the store was built from to a course and country
+    #
+    # Sheets without matching rows are left out. Each slice gets its own key (derived from the
+    # sheet's content key and the selection), so cached sections never mix selections up.
+    def select(self, collection_data_list, course_name, country):
+        collections = unique_collections(collection_data_list)
+        if [data["sheet_name"] for data in collections] != self.sheet_names:
+            raise ValueError("The collections don't match the sheets this store was built from")
+        selected = []
+        for sheet, collection_data in enumerate(collections):
+            rows = self.rows(course_name, country, sheet)
+            if not len(rows):
+                continue
+            key = collection_data.get("key")
+            selected.append(dict(
+                collection_data,
+                data=collection_data["data"].iloc[rows],
+                key=None if key is None else f"{key}|{course_name}|{country}",
+            ))
+        return selected
+
+
+_stores = OrderedDict()
+_lock = threading.Lock()
+
+
+# Function to get the store of a set of collections, built once per set of sheet keys
+def get_store(collection_data_list):
+    keys = tuple(data.get("key") for data in collection_data_list)
+    if not keys or None in keys:
+        return CollectionStore(collection_data_list)
+    with _lock:
+        store = _stores.get(keys)
+        if store is not None:
+            _stores.move_to_end(keys)
+            return store
+    store = CollectionStore(collection_data_list)
+    with _lock:
+        _stores[keys] = store
+        while len(_stores) > STORE_CACHE_SIZE:
+            _stores.popitem(last=False)
+    return store
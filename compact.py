@@ -0,0 +1,119 @@
+# Load-time dtype normalization: low-cardinality text becomes categorical, other text
+# Arrow-backed strings, and numeric columns are downcast where no value changes. Every
+# conversion is lossless, so filters, selectors and report renderers print the same cells.
+import numpy as np
+import pandas as pd
+
+# Text columns become categorical when at most this share of their values is distinct
+CATEGORY_MAX_RATIO = 0.5
+
+# Column kinds a schema spec may ask for
+KINDS = ("category", "string", "numeric")
+
+# NaN-as-missing Arrow string dtype (pandas' default "str" dtype from 3.0 on)
+try:
+    _STRING_DTYPE = pd.StringDtype("pyarrow", na_value=np.nan)
+except (TypeError, ImportError):
+    _STRING_DTYPE = None
+
+
+# Function to measure the memory held by a frame, including string payloads
+def frame_nbytes(df):
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+# Function to check that a column holds text (and missing values) only
+def _is_text(series):
+    if isinstance(series.dtype, pd.StringDtype):
+        return True
+    if series.dtype != object:
+        return False
+    return all(isinstance(value, str) for value in series.dropna())
+
+
+# Function to store a text column as Arrow strings
+def _to_string(series):
+    if _STRING_DTYPE is None or series.dtype == _STRING_DTYPE or not _is_text(series):
+        return series
+    return series.astype(_STRING_DTYPE)
+
+
+# Function to store a text column as categorical when it repeats enough to pay off
+def _to_category(series):
+    if not _is_text(series):
+        return series
+    if series.nunique() > CATEGORY_MAX_RATIO * len(series):
+        return _to_string(series)
+    return series.astype("category")
+
+
+# Function to check that float32 holds the values exactly and prints them the same way
+def _float32_exact(values):
+    values = pd.unique(values[~np.isnan(values)])
+    narrowed = values.astype(np.float32)
+    if not np.array_equal(narrowed.astype(np.float64), values):
+        return False
+    return all(str(a) == str(b) for a, b in zip(narrowed, values))
+
+
+# Function to downcast a numeric column to the smallest dtype that keeps every value
+def _to_numeric(series):
+    dtype = series.dtype
+    if not isinstance(dtype, np.dtype):
+        return series
+    if dtype.kind == "i":
+        return pd.to_numeric(series, downcast="integer")
+    if dtype.kind == "u":
+        return pd.to_numeric(series, downcast="unsigned")
+    if dtype == np.float64 and len(series) and _float32_exact(series.to_numpy()):
+        return series.astype(np.float32)
+    return series
+
+
+_CONVERTERS = {
+    "category": _to_category,
+    "string": _to_string,
+    "numeric": _to_numeric,
+}
+
+
+# Function to normalize a frame's dtypes following a {column: kind} spec
+#
+# Columns not in the spec (or missing from the frame) are left alone. Returns the
+# compact frame and a report with the bytes before and after and each changed column.
+def normalize(df, spec):
+    before = frame_nbytes(df)
+    converted = {}
+    changed = {}
+    for column, kind in spec.items():
+        if kind not in _CONVERTERS:
+            raise ValueError(f"Unknown column kind '{kind}' for '{column}'; expected one of {', '.join(KINDS)}")
+        if column not in df.columns:
+            continue
+        series = _CONVERTERS[kind](df[column])
+        if series.dtype != df[column].dtype:
+            converted[column] = series
+            changed[column] = (str(df[column].dtype), str(series.dtype))
+
+    if converted:
+        df = df.assign(**converted)
+    report = {"before_bytes": before, "after_bytes": frame_nbytes(df), "columns": changed}
+    return df, report
+
+
+# Function to add up the reports of several frames (e.g. every sheet of a workbook)
+def combine(reports):
+    report = {"before_bytes": 0, "after_bytes": 0, "columns": {}}
+    for part in reports:
+        report["before_bytes"] += part["before_bytes"]
+        report["after_bytes"] += part["after_bytes"]
+        report["columns"].update(part["columns"])
+    return report
+
+
+# Function to summarize a normalization report in one line
+def describe(report):
+    before = report["before_bytes"] / (1024 * 1024)
+    after = report["after_bytes"] / (1024 * 1024)
+    saved = 1 - report["after_bytes"] / report["before_bytes"] if report["before_bytes"] else 0
+    return f"{before:.2f} MB → {after:.2f} MB in memory ({saved:.0%} saved, {len(report['columns'])} columns compacted)"
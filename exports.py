@@ -0,0 +1,49 @@
+# On-demand export generation: documents are only built when a download is requested,
+# and the bytes are memoized per (dataset key, selection, format) so repeat downloads
+# and other sessions asking for the same export are served without rebuilding it.
+import os
+import threading
+
+import lru
+
+EXPORT_CACHE_MAX_BYTES = int(os.environ.get("GYANDHAN_EXPORT_CACHE_MAX_BYTES", 128 * 1024 * 1024))
+
+export_cache = lru.BoundedCache(EXPORT_CACHE_MAX_BYTES)
+
+_build_locks = {}
+_lock = threading.Lock()
+
+
+# Function to build an export and return its bytes, without caching it
+def build_export(build):
+    data = build()
+    if hasattr(data, "getvalue"):
+        return data.getvalue()
+    if isinstance(data, str):
+        return data.encode()
+    return data
+
+
+# Function to get the bytes of an export, building them with `build()` only on a cache miss
+def get_export(key, build):
+    data = export_cache.get(key)
+    if data is not None:
+        return data
+
+    # Concurrent requests for the same export wait for a single build
+    with _lock:
+        build_lock = _build_locks.setdefault(key, threading.Lock())
+    with build_lock:
+        data = export_cache.get(key)
+        if data is None:
+            data = build_export(build)
+            export_cache.put(key, data)
+    with _lock:
+        _build_locks.pop(key, None)
+    return data
+
+
+# Function to wrap an export as a zero-argument callable for st.download_button, so the
+# document is built when the button is clicked rather than on every rerun
+def lazy_export(key, build):
+    return lambda: get_export(key, build)
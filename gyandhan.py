@@ -1,42 +1,92 @@
+import math
 import streamlit as st
-import pandas as pd
 from io import BytesIO
-from docx import Document
-import matplotlib.pyplot as plt
-
-# Function to filter the data based on user selection
-def filter_data(df, college=None, course=None):
+import lazy
+import exports
+import profiling
+
+# The data layer (pandas, numpy, pyarrow) is only imported once a file has been uploaded;
+# python-docx and matplotlib are imported by the functions that build exports or charts
+pd = lazy.module("pandas")
+ingest = lazy.module("ingest")
+tables = lazy.module("tables")
+selection = lazy.module("selection")
+compact = lazy.module("compact")
+registry = lazy.module("registry")
+plots = lazy.module("plots")
+
+# Compact dtypes for the filter workbook (see compact.normalize)
+FILTER_DTYPES = {
+    'college': 'category',
+    'Course_name': 'category',
+    'Fees': 'numeric',
+    'Duration': 'numeric',
+    'TOEFL': 'numeric',
+    'IELTS': 'numeric',
+    'PTE': 'numeric',
+}
+
+# Rows shown per page of the result viewer
+RESULT_PAGE_SIZE = 50
+
+# Function to select the rows matching the user selection, keeping their native columns
+def select_rows(df, college=None, course=None, index=None):
     # Drop unnecessary columns (e.g., 'ID')
     df = df.drop(columns=['ID', 'Course_link'], errors='ignore')
 
-    if college:
-        df = df[df['college'] == college]
-    if course:
-        df = df[df['Course_name'] == course]
+    # Use the precomputed selection index when available instead of scanning the columns
+    if index is not None:
+        df = df.iloc[index.rows({'college': college or None, 'Course_name': course or None})]
+    else:
+        if college:
+            df = df[df['college'] == college]
+        if course:
+            df = df[df['Course_name'] == course]
     
     # Remove columns with all NA values, but keep those with some valid data
-    df = df.dropna(axis=1, how='all')
-    
-    # Transpose the dataframe to display headers as rows
-    df = df.T.reset_index()
-    df.columns = ['Field'] + [f'Value_{i}' for i in range(1, df.shape[1])]
+    return df.dropna(axis=1, how='all')
+
+# Function to transpose rows to display headers as rows; `start` is the position of the
+# first row within the selection, so a page keeps its Value_i numbering
+def transpose_rows(rows, start=0):
+    df = rows.T.reset_index()
+    df.columns = ['Field'] + [f'Value_{i}' for i in range(start + 1, start + df.shape[1])]
     return df
 
+# Function to filter the data based on user selection, as one transposed table
+def filter_data(df, college=None, course=None, index=None):
+    return transpose_rows(select_rows(df, college, course, index))
+
+# Function to show the selected rows one page at a time: only the visible page is transposed
+# and sent to the browser, and paging reruns just this fragment instead of the whole app
+@st.fragment
+def show_results(rows, page_size=RESULT_PAGE_SIZE):
+    pages = max(1, math.ceil(len(rows) / page_size))
+    page_column, view_column = st.columns([1, 2])
+    page = page_column.number_input(f'Page (of {pages})', min_value=1, max_value=pages, value=1, step=1)
+    view = view_column.radio('View:', ['Records', 'Table'], horizontal=True)
+
+    start = (page - 1) * page_size
+    window = rows.iloc[start:start + page_size]
+    st.caption(f'Rows {start + 1}–{start + len(window)} of {len(rows)}')
+    with profiling.stage("render_table", rows=len(window), view=view):
+        if view == 'Table':
+            st.dataframe(window, hide_index=True)
+        else:
+            # Record cards mix types in every column, so they are displayed as text
+            records = transpose_rows(window, start)
+            st.dataframe(records.astype(object).where(records.notna(), '').astype(str), hide_index=True)
+
 # Function to convert DataFrame to a Word document
 def df_to_word(df):
-    doc = Document()
-    table = doc.add_table(rows=1, cols=df.shape[1])
+    # python-docx is imported on first export, keeping it out of the app's cold start
+    from docx import Document
 
-    # Add headers to the Word table
-    hdr_cells = table.rows[0].cells
-    for i, column in enumerate(df.columns):
-        hdr_cells[i].text = str(column)
+    doc = Document()
 
-    # Add DataFrame rows to the Word table
-    for index, row in df.iterrows():
-        row_cells = table.add_row().cells
-        for i, value in enumerate(row):
-            row_cells[i].text = str(value)
+    # Add headers and all DataFrame rows to the Word table in bulk
+    tables.add_docx_table(doc, [str(column) for column in df.columns],
+                          [tables.text_cells(df, column) for column in df.columns])
 
     # Save to a buffer
     buffer = BytesIO()
@@ -50,72 +100,122 @@ def convert_to_numeric(df, columns):
         df[col] = pd.to_numeric(df[col], errors='coerce')
     return df
 
-# Updated function to plot a chart based on data
-def plot_chart(df, column):
-    # Drop any NaN values and check if the column has valid data to plot
-    valid_data = df[column].dropna()
+# Function to read, convert and compact the filter workbook; returns the frame and its memory report
+def load_filter_data(uploaded_file):
+    # The ID and link columns are never shown, so they are not loaded at all
+    with profiling.stage("read_sheet"):
+        df = ingest.read_sheet(uploaded_file, exclude=['ID', 'Course_link'], required=['college', 'Course_name'])
+
+    # Convert specific columns to numeric (assume these are the numeric ones)
+    numeric_columns = ['Fees', 'Duration', 'TOEFL', 'IELTS', 'PTE']
+    with profiling.stage("convert_to_numeric", rows=len(df)):
+        df = convert_to_numeric(df, numeric_columns)
+
+    # Store repeated text as categoricals and downcast numbers, losslessly
+    with profiling.stage("normalize_dtypes"):
+        return compact.normalize(df, FILTER_DTYPES)
+
+# Updated function to plot a chart based on data, aggregated server-side (see plots.AGGREGATIONS)
+# so at most plots.MAX_MARKS bars are drawn; the image is cached per `cache_key`
+def plot_chart(df, column, aggregation="histogram", cache_key=None):
+    png = plots.chart_png(df, column, aggregation, group='college', cache_key=cache_key)
     
-    if not valid_data.empty:
-        plt.figure(figsize=(10, 6))
-        valid_data.plot(kind='bar', color='skyblue')
-        plt.title(f'Distribution of {column}')
-        plt.xlabel(column)
-        plt.ylabel('Values')
-        st.pyplot(plt)
+    if png is not None:
+        st.image(png)
     else:
         st.write(f"No valid data to plot for '{column}'.")
 
+# Function to show the upload, filters, results and chart (returns early on an invalid upload)
+def show_filters():
+    # Sidebar for user selections
+    st.sidebar.header('Filter Options')
+    uploaded_file = st.sidebar.file_uploader("Upload your Excel file", type=['xlsx'])
+
+    if uploaded_file is None:
+        # Release the dataset of a cleared upload, so it can be evicted
+        st.session_state.pop("filter_dataset", None)
+    else:
+        # Load the workbook once per content hash; every session uploading the same file shares
+        # the one read-only copy, and the session keeps a handle to it so it isn't evicted
+        dataset_key = ingest.sheet_key(uploaded_file)
+        try:
+            handle = registry.acquire(("filter_data", dataset_key), lambda: load_filter_data(uploaded_file),
+                                      held=[st.session_state.get("filter_dataset")])
+        except ingest.SchemaError as e:
+            # The previous upload's dataset is released, so it can be evicted
+            st.session_state.pop("filter_dataset", None)
+            st.error(f"The uploaded file is missing required columns: {', '.join(e.missing_columns)}.")
+            return
+        st.session_state["filter_dataset"] = handle
+        df, memory_report = handle.value
+        st.sidebar.caption(compact.describe(memory_report))
+
+        # Index (college, course) once per workbook so selections don't rescan the data
+        with profiling.stage("selection_index"):
+            index = selection.get_index(df, ['college', 'Course_name'], dataset_key)
+
+        # Display available options for filtering (only courses offered by the selected college)
+        college_options = index.options('college')
+        selected_college = st.sidebar.selectbox('Select College', options=[None] + list(college_options))
+
+        course_options = index.options('Course_name', {'college': selected_college})
+        selected_course = st.sidebar.selectbox('Select Course', options=[None] + list(course_options))
+
+        # Filter data based on selection
+        selection_key = {'college': selected_college, 'Course_name': selected_course}
+        with profiling.stage("select_rows"):
+            selected_rows = select_rows(df, college=selected_college, course=selected_course, index=index)
+
+        # Display the filtered data, one page at a time
+        if not selected_rows.empty:
+            st.header(f'Data for {selected_college} - {selected_course}')
+            st.write('Filtered Data:')
+            show_results(selected_rows)
+
+            # Provide the Word download; the document (the full transposed table) is only built
+            # when the button is clicked and is memoized per workbook and selection
+            st.download_button(
+                label="Download as Word",
+                data=exports.lazy_export((dataset_key, selected_college, selected_course, "docx"),
+                                         profiling.profiled("df_to_word", lambda: df_to_word(transpose_rows(selected_rows)))),
+                file_name="filtered_data.docx",
+                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+            )
+
+            # Adding a chart for visualization
+            st.header("Data Visualization")
+
+            # List the numeric columns available for chart
+            numeric_columns = df.select_dtypes(include='number').columns.tolist()
+            if numeric_columns:
+                chart_column = st.selectbox('Select column for chart:', options=numeric_columns)
+                aggregation = st.radio('Aggregation:', options=list(plots.AGGREGATIONS),
+                                       format_func=plots.AGGREGATIONS.get, horizontal=True)
+
+                # Chart the selected rows only
+                with profiling.stage("plot_chart", aggregation=aggregation):
+                    plot_chart(df.iloc[index.rows(selection_key)], chart_column, aggregation,
+                               cache_key=(dataset_key, selected_college, selected_course))
+            else:
+                st.write("No numeric data available for charting.")
+        else:
+            st.write("No data available for the selected college and course.")
+
 # Streamlit app
-st.set_page_config(layout="wide")  # Wide layout for better display
+def main():
+    st.set_page_config(layout="wide")  # Wide layout for better display
 
-st.title('College & Course Filter App')
+    # Optional per-stage timing/memory breakdown (also on by default with GYANDHAN_PROFILE=1)
+    profile = st.sidebar.toggle("Profile this run", value=profiling.ENABLED)
+    profiling.begin_run("gyandhan", profile)
 
-# Sidebar for user selections
-st.sidebar.header('Filter Options')
-uploaded_file = st.sidebar.file_uploader("Upload your Excel file", type=['xlsx'])
+    st.title('College & Course Filter App')
+    show_filters()
 
-if uploaded_file is not None:
-    # Read Excel file
-    df = pd.read_excel(uploaded_file)
+    if profile:
+        panel = st.sidebar.expander("Profiling", expanded=True)
+        profiling.render_panel(panel)
+        panel.caption(registry.describe())
 
-    # Convert specific columns to numeric (assume these are the numeric ones)
-    numeric_columns = ['Fees', 'Duration', 'TOEFL', 'IELTS', 'PTE']
-    df = convert_to_numeric(df, numeric_columns)
-
-    # Display available options for filtering
-    college_options = df['college'].dropna().unique()
-    course_options = df['Course_name'].dropna().unique()
-
-    selected_college = st.sidebar.selectbox('Select College', options=[None] + list(college_options))
-    selected_course = st.sidebar.selectbox('Select Course', options=[None] + list(course_options))
-
-    # Filter data based on selection
-    filtered_data = filter_data(df, college=selected_college, course=selected_course)
-
-    # Display the filtered data
-    if not filtered_data.empty:
-        st.header(f'Data for {selected_college} - {selected_course}')
-        st.write('Filtered Data:')
-        st.dataframe(filtered_data)
-
-        # Convert DataFrame to Word and provide download option
-        word_file = df_to_word(filtered_data)
-        st.download_button(
-            label="Download as Word",
-            data=word_file,
-            file_name="filtered_data.docx",
-            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        )
-
-        # Adding a chart for visualization
-        st.header("Data Visualization")
-
-        # List the numeric columns available for chart
-        numeric_columns = df.select_dtypes(include='number').columns.tolist()
-        if numeric_columns:
-            chart_column = st.selectbox('Select column for chart:', options=numeric_columns)
-            plot_chart(df, chart_column)
-        else:
-            st.write("No numeric data available for charting.")
-    else:
-        st.write("No data available for the selected college and course.")
+if __name__ == "__main__":
+    main()
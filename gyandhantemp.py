@@ -1,30 +1,89 @@
 # Step 1: Import Libraries and Define Helper Functions
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.io as pio
 from io import BytesIO
-from docx import Document
-from docx.shared import Inches
-import base64
-
-# Set Plotly theme to 'plotly_white'
-pio.templates.default = "plotly_white"
-
-# Helper function to create download links
-def download_link(object_to_download, download_filename, download_link_text):
-    b64 = base64.b64encode(object_to_download).decode()
-    return f'<a href="data:application/octet-stream;base64,{b64}" download="{download_filename}">{download_link_text}</a>'
-
-# Function to save Plotly figures as images
-def save_plotly_fig_as_image(fig, filename):
-    fig.write_image(filename)
+import lazy
+import charts
+import exports
+import sections
+import profiling
+import jobs
+import html_report
+
+# The data layer (pandas, numpy, pyarrow) is only imported once a file has been uploaded;
+# plotly and python-docx are imported by the functions that draw charts or build documents
+pd = lazy.module("pandas")
+ingest = lazy.module("ingest")
+tables = lazy.module("tables")
+selection = lazy.module("selection")
+compact = lazy.module("compact")
+registry = lazy.module("registry")
+collection_store = lazy.module("collection_store")
+
+# Columns each uploaded workbook must provide
+COURSE_REQUIRED_COLUMNS = ['Course Name', 'Country', 'University Name', 'Tuition Fees (INR)', 'Living Expenses (INR)']
+COURSE_SELECTION_COLUMNS = ['Course Name', 'Country']
+# Only these columns of the Course Details sheet are loaded (optional ones when present)
+COURSE_COLUMNS = COURSE_REQUIRED_COLUMNS + ['Acceptance Rate (%)', 'Top Specializations', 'Relevant YouTube Video URL', 'Top Employers', 'Median Salary (USD)']
+COLLECTION_REQUIRED_COLUMNS = ['Course Name', 'Country', 'Collection Name', 'University Name', 'Tuition Fees', 'Acceptance Rate', 'Application Link', 'Ranking', 'Agency Name', 'Stream']
+
+# Compact dtypes applied on load (see compact.normalize); renderers print the same cells
+COURSE_DTYPES = {
+    'Course Name': 'category',
+    'Country': 'category',
+    'University Name': 'category',
+    'Tuition Fees (INR)': 'numeric',
+    'Living Expenses (INR)': 'numeric',
+    'Acceptance Rate (%)': 'numeric',
+    'Top Specializations': 'category',
+    'Relevant YouTube Video URL': 'category',
+    'Top Employers': 'category',
+    'Median Salary (USD)': 'numeric',
+}
+COLLECTION_DTYPES = {
+    'Course Name': 'category',
+    'Country': 'category',
+    'Collection Name': 'category',
+    'University Name': 'category',
+    'Tuition Fees': 'numeric',
+    'Acceptance Rate': 'numeric',
+    'Application Link': 'string',
+    'Ranking': 'numeric',
+    'Agency Name': 'category',
+    'Stream': 'category',
+}
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# How often the UI checks on a background report build
+JOB_POLL_SECONDS = 0.5
+
+# Function to rasterize Plotly figures to in-memory PNG bytes (cached by figure data)
+def plotly_fig_to_image(fig):
+    return charts.figure_image(fig)
+
+# Function to build the bar and scatter figures shown in the app and embedded in the downloads
+def build_graph_figures(graph_data):
+    # Plotly is imported on first use, keeping it out of the app's cold start
+    import plotly.express as px
+    import plotly.io as pio
+
+    # Set Plotly theme to 'plotly_white'
+    pio.templates.default = "plotly_white"
+
+    # Create Bar Plot
+    bar_fig = px.bar(graph_data, x='University Name', y='Tuition Fees (INR)',
+                    title='Tuition Fees by University')
+
+    # Create Scatter Plot
+    scatter_fig = px.scatter(graph_data, x='University Name', y='Tuition Fees (INR)',
+                            size='Acceptance Rate (%)', hover_name='University Name',
+                            title='Tuition Fees vs Acceptance Rate')
+    return bar_fig, scatter_fig
 
 # Function to list all sheets in the uploaded Excel file
 def list_excel_sheets(uploaded_file):
     if uploaded_file is not None:
-        xls = pd.ExcelFile(uploaded_file)
-        return xls.sheet_names
+        return ingest.sheet_names(uploaded_file)
     return []
 # Step 2: Handle File Uploads for Course Details
 def handle_file_uploads():
@@ -32,21 +91,31 @@ def handle_file_uploads():
     uploaded_course_file = st.file_uploader("Upload Course Details Excel File", type="xlsx", key="course_file")
 
     course_details = None
+    course_key = None
     if uploaded_course_file:
         course_sheets = list_excel_sheets(uploaded_course_file)
         selected_sheet = st.selectbox("Select the sheet to load:", course_sheets, key="course_sheet_select")
-        course_details = pd.read_excel(uploaded_course_file, sheet_name=selected_sheet)
-
-        # Verify required columns in Course Details
-        required_columns = ['Course Name', 'Country', 'University Name', 'Tuition Fees (INR)', 'Living Expenses (INR)']
-        for col in required_columns:
-            if col not in course_details.columns:
-                st.error(f"Required column '{col}' is missing in Course Details. Please ensure that your file contains this column.")
-                return None, []
 
+        # Verify required columns in Course Details (checked on the header row, before the data is read).
+        # The sheet is loaded once per content hash and shared read-only by every session using it
+        course_key = ingest.sheet_key(uploaded_course_file, selected_sheet)
+        try:
+            handle = registry.acquire(("course_details", course_key), lambda: load_course_details(uploaded_course_file, selected_sheet),
+                                      held=[st.session_state.get("course_dataset")])
+        except ingest.SchemaError as e:
+            st.session_state.pop("course_dataset", None)
+            st.error(f"Required column '{e.missing_columns[0]}' is missing in Course Details. Please ensure that your file contains this column.")
+            return None, None
+
+        st.session_state["course_dataset"] = handle  # Keeps the shared copy alive for this session
+        course_details, memory_report = handle.value
         st.success("Course Details uploaded successfully!")
+        st.caption(compact.describe(memory_report))
+    else:
+        # Release the dataset of a cleared upload, so it can be evicted
+        st.session_state.pop("course_dataset", None)
 
-    return course_details
+    return course_details, course_key
 # Step 3: Handle Collection Data Uploads
 def handle_collection_uploads():
     st.header("Upload Collection Data File")
@@ -55,85 +124,113 @@ def handle_collection_uploads():
     collection_data_list = []
     
     if uploaded_collection_file:
-        collection_sheets = list_excel_sheets(uploaded_collection_file)
-        
-        for sheet_name in collection_sheets:
-            collection_data = pd.read_excel(uploaded_collection_file, sheet_name=sheet_name)
-            required_columns = ['Course Name', 'Country', 'Collection Name', 'University Name', 'Tuition Fees', 'Acceptance Rate', 'Application Link', 'Ranking', 'Agency Name', 'Stream']
-            missing_columns = [col for col in required_columns if col not in collection_data.columns]
-            
-            if missing_columns:
-                st.warning(f"The following columns are missing in the '{sheet_name}' sheet: {', '.join(missing_columns)}. Please correct the values in the file.")
-                continue
-            
-            collection_data_list.append({
-                "sheet_name": sheet_name,
-                "data": collection_data
-            })
+        collection_data_list = load_collection_data(uploaded_collection_file, shared=True,
+                                                    held=st.session_state.get("collection_datasets", ()))
+        st.session_state["collection_datasets"] = [data["handle"] for data in collection_data_list]
+        if collection_data_list:
+            st.caption(compact.describe(compact.combine(data["memory"] for data in collection_data_list)))
+    else:
+        st.session_state.pop("collection_datasets", None)
+
+    return collection_data_list
+
+# Function to read and compact one sheet of Course Details; returns the frame and its memory report
+def load_course_details(uploaded_file, sheet_name=0):
+    course_details = ingest.read_sheet(uploaded_file, sheet_name=sheet_name,
+                                       columns=COURSE_COLUMNS, required=COURSE_REQUIRED_COLUMNS)
+    return compact.normalize(course_details, COURSE_DTYPES)
+
+# Function to read and compact one collection sheet; returns the frame and its memory report
+def load_collection_sheet(uploaded_file, sheet_name):
+    collection_data = ingest.read_sheet(uploaded_file, sheet_name=sheet_name,
+                                        columns=COLLECTION_REQUIRED_COLUMNS, required=COLLECTION_REQUIRED_COLUMNS)
+    return compact.normalize(collection_data, COLLECTION_DTYPES)
+
+# Function to read and validate every sheet of a collection workbook
+#
+# With `shared`, each sheet comes from the process-wide dataset registry and its entry
+# carries the handle that keeps the shared copy alive; handles in `held` are reused.
+# Sheets failing validation are skipped and reported through `warn` (the app shows them).
+def load_collection_data(uploaded_file, shared=False, held=(), warn=st.warning):
+    collection_data_list = []
+    collection_sheets = list_excel_sheets(uploaded_file)
+    
+    for sheet_name in collection_sheets:
+        key = ingest.sheet_key(uploaded_file, sheet_name)
+        handle = None
+        try:
+            if shared:
+                handle = registry.acquire(("collection", key), lambda: load_collection_sheet(uploaded_file, sheet_name), held)
+                collection_data, memory_report = handle.value
+            else:
+                collection_data, memory_report = load_collection_sheet(uploaded_file, sheet_name)
+        except ingest.SchemaError as e:
+            warn(f"The following columns are missing in the '{sheet_name}' sheet: {', '.join(e.missing_columns)}. Please correct the values in the file.")
+            continue
+
+        collection_data_list.append({
+            "sheet_name": sheet_name,
+            "data": collection_data,
+            "key": key,
+            "memory": memory_report,
+            "handle": handle
+        })
 
     return collection_data_list
 # Step 4: Read Third Excel File
-def read_third_excel_file(uploaded_file):
+# Validation problems are reported through `error` (the app shows them) and return no data
+def read_third_excel_file(uploaded_file, error=st.error):
     if uploaded_file:
-        xls = pd.ExcelFile(uploaded_file)
+        sheet_names = list_excel_sheets(uploaded_file)
 
         # Verify the required sheets exist
         expected_sheets = ['Tuition Fees', 'Living Expenses', 'Important Deadlines']
-        missing_sheets = [sheet for sheet in expected_sheets if sheet not in xls.sheet_names]
+        missing_sheets = [sheet for sheet in expected_sheets if sheet not in sheet_names]
         
         if missing_sheets:
-            st.error(f"The following sheets are missing in the uploaded file: {', '.join(missing_sheets)}.")
+            error(f"The following sheets are missing in the uploaded file: {', '.join(missing_sheets)}.")
             return None, None, None
 
-        # Read each sheet into a DataFrame
-        tuition_fees_data = pd.read_excel(xls, sheet_name='Tuition Fees')
-        living_expenses_data = pd.read_excel(xls, sheet_name='Living Expenses')
-        deadlines_data = pd.read_excel(xls, sheet_name='Important Deadlines')
+        # Read each sheet into a DataFrame (parsed once per workbook, then served from the cache)
+        tuition_fees_data = ingest.read_sheet(uploaded_file, sheet_name='Tuition Fees')
+        living_expenses_data = ingest.read_sheet(uploaded_file, sheet_name='Living Expenses')
+        deadlines_data = ingest.read_sheet(uploaded_file, sheet_name='Important Deadlines')
 
         # Verify required columns in Tuition Fees
         if 'Tuition Fees (INR)' not in tuition_fees_data.columns:
-            st.error("Column 'Tuition Fees (INR)' is missing in Tuition Fees data.")
+            error("Column 'Tuition Fees (INR)' is missing in Tuition Fees data.")
             return None, None, None
 
         # Verify required columns in Living Expenses
         if 'Monthly Cost (INR)' not in living_expenses_data.columns and 'Annual Cost (INR)' not in living_expenses_data.columns:
-            st.error("Columns 'Monthly Cost (INR)' and 'Annual Cost (INR)' are missing in Living Expenses data.")
+            error("Columns 'Monthly Cost (INR)' and 'Annual Cost (INR)' are missing in Living Expenses data.")
             return None, None, None
 
         return tuition_fees_data, living_expenses_data, deadlines_data
+# Function to pick the collections for a report: every row of every sheet with `include_all`,
+# otherwise only the rows of the selected course and country (looked up in the indexed store)
+def select_collections(collection_data_list, course_name, country, include_all=False):
+    if include_all:
+        return collection_data_list
+    return collection_store.get_store(collection_data_list).select(collection_data_list, course_name, country)
+
 # Step 5: Generate Graph Data
-def generate_graph_data(course_details):
+def generate_graph_data(course_details, error=st.error):
     required_columns = ['University Name', 'Tuition Fees (INR)', 'Acceptance Rate (%)']
     for col in required_columns:
         if col not in course_details.columns:
-            st.error(f"Required column '{col}' is missing in Course Details. Please ensure that your file contains this column.")
+            error(f"Required column '{col}' is missing in Course Details. Please ensure that your file contains this column.")
             return pd.DataFrame()  # Return an empty DataFrame in case of error
     
     # Prepare data suitable for visualizations
     graph_data = course_details[required_columns].copy()
     return graph_data
 # Step 6: Generate Final Content
-def generate_final_content(course_details, graph_data, collection_data_list, course_name, country, tuition_fees_data, living_expenses_data, deadlines_data):
-    # Filter course details based on the selected course and country
-    selected_course = course_details[(course_details['Course Name'] == course_name) & 
-                                      (course_details['Country'] == country)]
-    
-    if selected_course.empty:
-        st.error("No course details found for the selected course and country.")
-        return ""
-
-    content = f"# {course_name} in {country}\n\n"
-    
-    # Overview Section
-    content += f"## Overview\n"
-    content += (f"The {course_name} in {country} is a prestigious degree attracting international students. "
-                f"Top specializations include {selected_course.iloc[0]['Top Specializations']}, and universities like "
-                f"{selected_course.iloc[0]['University Name']} are renowned for their research opportunities.\n\n")
-    
-    # Embed YouTube video after Overview
-    youtube_link = selected_course.iloc[0]['Relevant YouTube Video URL']  # Get from the DataFrame
-    content += f"You can watch this video for more information: [Watch Video]({youtube_link})\n\n"
+# Sections that don't depend on the selected course are rendered by the helpers below and
+# cached by sections.cached under the content keys of the data they read.
 
+# Function to total the tuition fees and living expenses
+def cost_totals(tuition_fees_data, living_expenses_data):
     # Cost Section: Ensure tuition fees and living expenses data are valid before accessing
     tuition_fees = 0
     living_expenses = 0
@@ -143,68 +240,159 @@ def generate_final_content(course_details, graph_data, collection_data_list, cou
     
     if living_expenses_data is not None:
         living_expenses = living_expenses_data['Monthly Cost (INR)'].sum()  # Calculate total living expenses
+    return tuition_fees, living_expenses
+
+# Function to render the Important Deadlines section
+def render_deadlines_section(deadlines_data):
+    content = ["## Important Deadlines\n"]
+    if deadlines_data is not None and not deadlines_data.empty:
+        content.append("| **Event** | **Date** | **Notes** |\n")
+        content.append("|----------|----------|-----------|\n")
+        content.append(tables.markdown_rows(
+            tables.text_cells(deadlines_data, 'Event'),
+            tables.text_cells(deadlines_data, 'Date'),
+            tables.text_cells(deadlines_data, 'Notes', default='N/A')
+        ))
+    else:
+        content.append("No important deadlines available.\n\n")
+    return "".join(content)
+
+# Function to render one collection with its H2 header, description and formatted table
+def render_collection_section(collection_data):
+    sheet_name = collection_data["sheet_name"]
+    data = collection_data["data"]
+    description = collection_data.get("description", "")
     
-    content += f"## Cost and Living Expenses\n"
-    content += (f"The cost of studying {course_name} in {country} ranges from **{tuition_fees}** for tuition and approximately "
-                f"**{living_expenses}** for living expenses per year.\n\n")
+    # Add Section Header and Description
+    content = [f"## {sheet_name}\n\n", f"{description}\n\n"]
+    
+    # Add the collection data as a formatted Markdown table, one column at a time
+    content.append("| **University Name** | **Tuition Fees (INR)** | **Acceptance Rate (%)** | **Application Link** | **Ranking** |\n")
+    content.append("|---------------------|------------------------|------------------------|----------------------|-------------|\n")
+    content.append(tables.markdown_rows(
+        tables.text_cells(data, 'University Name'),
+        tables.text_cells(data, 'Tuition Fees'),
+        tables.text_cells(data, 'Acceptance Rate', suffix='%'),
+        list(map("[Apply Here]({})".format, tables.text_cells(data, 'Application Link'))),
+        tables.ranking_cells(data)
+    ))
+    return "".join(content)
+
+# Function to gather the structured data of a report, shared by the Markdown, Word and HTML renderers
+#
+# Returns None when no course details match the selected course and country.
+def build_report(course_details, collection_data_list, course_name, country, tuition_fees_data, living_expenses_data, deadlines_data, selection_index=None, details_key=None):
+    # Filter course details based on the selected course and country
+    if selection_index is not None:
+        selected_course = course_details.iloc[selection_index.rows({'Course Name': course_name, 'Country': country})]
+    else:
+        selected_course = course_details[(course_details['Course Name'] == course_name) & 
+                                          (course_details['Country'] == country)]
+    
+    if selected_course.empty:
+        return None
+    course = selected_course.iloc[0]
+
+    # Cost totals depend only on the University Details file
+    tuition_fees, living_expenses = sections.cached(
+        ("cost_totals", details_key), lambda: cost_totals(tuition_fees_data, living_expenses_data))
+
+    return {
+        "course_name": course_name,
+        "country": country,
+        "title": f"{course_name} in {country}",
+        "overview": f"The {course_name} in {country} is a prestigious degree attracting international students. "
+                    f"Top specializations include {course['Top Specializations']}, and universities like "
+                    f"{course['University Name']} are renowned for their research opportunities.",
+        "video_url": course['Relevant YouTube Video URL'],
+        "tuition_fees": tuition_fees,
+        "living_expenses": living_expenses,
+        "deadlines_data": deadlines_data,
+        "details_key": details_key,
+        # Avoid duplicates
+        "collections": list({data["sheet_name"]: data for data in collection_data_list}.values()),
+        "job_prospects": f"Graduates from {course_name} in {country} often secure high-paying roles with companies like "
+                         f"{course['Top Employers']}. Starting salaries average around {course['Median Salary (USD)']}.",
+    }
+
+# Function to render a report as Markdown (the on-screen content and the basis of the Word document)
+def render_markdown(report):
+    course_name = report["course_name"]
+    country = report["country"]
+    tuition_fees = report["tuition_fees"]
+    living_expenses = report["living_expenses"]
+
+    # Sections are collected as parts and joined once at the end
+    content = [f"# {report['title']}\n\n"]
+    
+    # Overview Section
+    content.append(f"## Overview\n")
+    content.append(f"{report['overview']}\n\n")
+    
+    # Embed YouTube video after Overview
+    content.append(f"You can watch this video for more information: [Watch Video]({report['video_url']})\n\n")
+
+    # Cost Section
+    content.append(f"## Cost and Living Expenses\n")
+    content.append(f"The cost of studying {course_name} in {country} ranges from **{tuition_fees}** for tuition and approximately "
+                   f"**{living_expenses}** for living expenses per year.\n\n")
     
     # Add a table for Cost and Living Expenses
-    content += "| **Type** | **Amount (INR)** |\n"
-    content += "|----------|------------------|\n"
-    content += f"| Tuition Fees | **{tuition_fees}** |\n"
-    content += f"| Living Expenses | **{living_expenses}** |\n\n"
+    content.append("| **Type** | **Amount (INR)** |\n")
+    content.append("|----------|------------------|\n")
+    content.append(f"| Tuition Fees | **{tuition_fees}** |\n")
+    content.append(f"| Living Expenses | **{living_expenses}** |\n\n")
 
     # Important Deadlines Section
-    content += "## Important Deadlines\n"
-    if deadlines_data is not None and not deadlines_data.empty:
-        content += "| **Event** | **Date** | **Notes** |\n"
-        content += "|----------|----------|-----------|\n"
-        for _, row in deadlines_data.iterrows():
-            content += f"| {row['Event']} | {row['Date']} | {row.get('Notes', 'N/A')} |\n"
-    else:
-        content += "No important deadlines available.\n\n"
+    content.append(sections.cached(("deadlines", report["details_key"]),
+                                   lambda: render_deadlines_section(report["deadlines_data"])))
 
     # Add each collection with H2 headers, brief descriptions, and formatted tables
-    unique_collections = {data["sheet_name"]: data for data in collection_data_list}  # Avoid duplicates
-
-    for collection_data in unique_collections.values():
-        sheet_name = collection_data["sheet_name"]
-        data = collection_data["data"]
-        description = collection_data.get("description", "")
-        
-        # Add Section Header and Description
-        content += f"## {sheet_name}\n\n"
-        content += f"{description}\n\n"
-        
-        # Add the collection data as a formatted Markdown table
-        content += "| **University Name** | **Tuition Fees (INR)** | **Acceptance Rate (%)** | **Application Link** | **Ranking** |\n"
-        content += "|---------------------|------------------------|------------------------|----------------------|-------------|\n"
-        
-        for _, row in data.iterrows():
-            ranking = f"Ranked {row['Ranking']} in {row['Stream']} by {row['Agency Name']}" if pd.notna(row['Ranking']) else 'N/A'
-            content += (f"| {row['University Name']} | {row['Tuition Fees']} | {row['Acceptance Rate']}% | "
-                        f"[Apply Here]({row['Application Link']}) | {ranking} |\n")
+    for collection_data in report["collections"]:
+        content.append(sections.cached(("collection", collection_data.get("key")),
+                                       lambda: render_collection_section(collection_data)))
     
     # Job Prospects Section
-    content += "\n## Job Prospects and Career Growth\n"
-    content += (f"Graduates from {course_name} in {country} often secure high-paying roles with companies like "
-                f"{selected_course.iloc[0]['Top Employers']}. Starting salaries average around {selected_course.iloc[0]['Median Salary (USD)']}.\n\n")
+    content.append("\n## Job Prospects and Career Growth\n")
+    content.append(f"{report['job_prospects']}\n\n")
 
-    return content
+    return "".join(content)
+
+def generate_final_content(course_details, graph_data, collection_data_list, course_name, country, tuition_fees_data, living_expenses_data, deadlines_data, selection_index=None, details_key=None):
+    report = build_report(course_details, collection_data_list, course_name, country,
+                          tuition_fees_data, living_expenses_data, deadlines_data, selection_index, details_key)
+    if report is None:
+        st.error("No course details found for the selected course and country.")
+        return ""
+    return render_markdown(report)
+
+# Function to add one collection's table to the Word document
+def add_collection_table(doc, data):
+    return tables.add_docx_table(doc, ['University Name', 'Tuition Fees', 'Acceptance Rate', 'Application Link', 'Ranking'], [
+        tables.text_cells(data, 'University Name'),
+        tables.text_cells(data, 'Tuition Fees', placeholder='N/A'),
+        tables.text_cells(data, 'Acceptance Rate', suffix='%', placeholder='N/A'),
+        tables.text_cells(data, 'Application Link', placeholder='N/A'),
+        tables.ranking_cells(data)
+    ])._tbl
+
+def generate_word_with_images(content, collection_data_list, graph_images, progress=None):
+    # python-docx is imported on first export, keeping it out of the app's cold start
+    from docx import Document
+    from docx.shared import Inches
 
-def generate_word_with_images(content, collection_data_list, graph_image_paths):
     doc = Document()
     
     # Add document title
     doc.add_heading(content.split('\n')[0], 0)  
     
-    # Add paragraphs from content
+    # Add paragraphs from content (long ones, such as collection tables, are replayed from the cache)
     paragraphs = content.split('\n\n')
     for para in paragraphs[1:]:
-        doc.add_paragraph(para)
+        sections.add_paragraph(doc, para)
     
     # Add collections (with tables) from the collection_data_list
-    for collection_data in collection_data_list:
+    for position, collection_data in enumerate(collection_data_list, 1):
         sheet_name = collection_data["sheet_name"]
         data = collection_data["data"]
         description = collection_data.get("description", "")
@@ -213,28 +401,16 @@ def generate_word_with_images(content, collection_data_list, graph_image_paths):
         doc.add_heading(f"{sheet_name}", level=2)
         doc.add_paragraph(description)
         
-        # Create a table
-        table = doc.add_table(rows=1, cols=5)
-        hdr_cells = table.rows[0].cells
-        hdr_cells[0].text = 'University Name'
-        hdr_cells[1].text = 'Tuition Fees'
-        hdr_cells[2].text = 'Acceptance Rate'
-        hdr_cells[3].text = 'Application Link'
-        hdr_cells[4].text = 'Ranking'
-
-        # Populate the table with data
-        for _, row in data.iterrows():
-            row_cells = table.add_row().cells
-            row_cells[0].text = str(row['University Name'])
-            row_cells[1].text = str(row['Tuition Fees']) if pd.notna(row['Tuition Fees']) else 'N/A'
-            row_cells[2].text = str(row['Acceptance Rate']) + '%' if pd.notna(row['Acceptance Rate']) else 'N/A'
-            row_cells[3].text = str(row['Application Link']) if pd.notna(row['Application Link']) else 'N/A'
-            row_cells[4].text = f"Ranked {row['Ranking']} in {row['Stream']} by {row['Agency Name']}" if pd.notna(row['Ranking']) else 'N/A'
+        # Create the table in bulk from whole formatted columns, once per collection sheet
+        sections.add_cached_block(doc, ("collection_docx", collection_data.get("key")),
+                                  lambda doc: add_collection_table(doc, data))
+        if progress is not None:
+            progress(position, len(collection_data_list))
     
     # Add graphs to the Word document
     doc.add_heading('Graphs and Visualizations', level=1)
-    for img_path in graph_image_paths:
-        doc.add_picture(img_path, width=Inches(5.0))
+    for image in graph_images:
+        doc.add_picture(BytesIO(image) if isinstance(image, bytes) else image, width=Inches(5.0))
     
     # Save the document to memory
     buffer = BytesIO()
@@ -243,33 +419,161 @@ def generate_word_with_images(content, collection_data_list, graph_image_paths):
     
     return buffer
 # Step 8: Generate HTML Content for Download
-def generate_html(content, graph_image_paths):
-    html_content = f"<html><head><title>{content.split('\n')[0]}</title></head><body>"
-    paragraphs = content.split('\n\n')
+# Function to get the (university, fees, rate, link, ranking) rows of one collection's HTML table
+def html_collection_rows(data):
+    return zip(
+        tables.text_cells(data, 'University Name', placeholder='N/A'),
+        tables.text_cells(data, 'Tuition Fees', placeholder='N/A'),
+        tables.text_cells(data, 'Acceptance Rate', suffix='%', placeholder='N/A'),
+        tables.text_cells(data, 'Application Link', placeholder=''),
+        tables.ranking_cells(data)
+    )
+
+# Function to build the template context of a report's HTML page
+#
+# Collection rows are formatted lazily, one table at a time as the page is generated.
+def html_context(report, graph_images):
+    deadlines_data = report["deadlines_data"]
+    deadlines = None
+    if deadlines_data is not None and not deadlines_data.empty:
+        deadlines = zip(
+            tables.text_cells(deadlines_data, 'Event', placeholder='N/A'),
+            tables.text_cells(deadlines_data, 'Date', placeholder='N/A'),
+            tables.text_cells(deadlines_data, 'Notes', placeholder='N/A', default='N/A')
+        )
+    video_url = report["video_url"]
+    return dict(
+        report,
+        video_url=None if pd.isna(video_url) else str(video_url),
+        deadlines=deadlines,
+        collections=({
+            "name": collection_data["sheet_name"],
+            "description": collection_data.get("description", ""),
+            "rows": html_collection_rows(collection_data["data"]),
+        } for collection_data in report["collections"]),
+        images=html_report.image_uris(graph_images),
+    )
+
+# Function to write a report's HTML page to a binary file, chunk by chunk as it is generated
+def write_html(file, report, graph_images):
+    return html_report.write(file, "report.html", html_context(report, graph_images))
+
+# Function to render a report's HTML page to bytes
+def generate_html(report, graph_images):
+    return html_report.render("report.html", html_context(report, graph_images))
+# Function to build the Word and HTML downloads inside a background job, reporting progress.
+# Both documents are stored in the export cache, so other sessions asking for them reuse them
+def build_report_documents(job, export_key, report, content, collection_data_list, figures):
+    steps = len(figures) + len(collection_data_list) + 1
+    graph_images = []
+    warning = None
+    for position, fig in enumerate(figures):
+        job.report(position / steps, f"Rendering chart {position + 1} of {len(figures)}")
+        try:
+            graph_images.append(plotly_fig_to_image(fig))
+        except RuntimeError as e:
+            # Without a renderer the charts are left out
+            warning = f"Charts could not be rendered for the downloads: {e}"
+            graph_images = []
+            break
+
+    # Documents missing their charts are not cached, so a later build (once the renderer
+    # works again) includes them
+    if warning is None:
+        get_export = exports.get_export
+        suffix = ""
+    else:
+        get_export = lambda key, build: exports.build_export(build)
+        suffix = " (without charts)"
+
+    job.report(len(figures) / steps, f"Building Word document{suffix}")
+    docx = get_export(export_key + ("docx",), lambda: generate_word_with_images(
+        content, collection_data_list, graph_images,
+        progress=lambda done, total: job.report((len(figures) + done) / steps, f"Added collection {done} of {total}{suffix}")))
+
+    job.report((steps - 1) / steps, f"Building HTML document{suffix}")
+    html = get_export(export_key + ("html",), lambda: generate_html(report, graph_images))
+    return {"docx": docx, "html": html, "warning": warning}
+
+# Function to show the download buttons for built documents
+def show_download_buttons(documents, course_name):
+    if documents.get("warning"):
+        st.warning(documents["warning"])
+    st.download_button(
+        label="Download Word Document",
+        data=documents["docx"],
+        file_name=f"{course_name}_complete_with_rankings.docx",
+        mime=DOCX_MIME
+    )
+    st.download_button(
+        label="Download HTML Document",
+        data=documents["html"],
+        file_name=f"{course_name}_complete_content.html",
+        mime="text/html"
+    )
+
+# Function to show a running job's progress, polled without rerunning the rest of the app;
+# once the job has finished the whole app reruns to show its outcome
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def show_job_progress(job):
+    if job.finished:
+        st.rerun()
+    st.progress(job.progress, text=f"{job.message} (job {job.id})")
+    if st.button("Cancel", key="cancel_report_job"):
+        jobs.abandon(job)
+        st.session_state.pop("report_job", None)
+        st.rerun()
+
+# Function to offer the Word and HTML downloads, building them in the background on request
+def report_downloads(export_key, course_name, build):
+    job = st.session_state.get("report_job")
+
+    # A build for a previous selection is abandoned (and cancelled if nobody else waits for it)
+    if job is not None and job.key != export_key:
+        jobs.abandon(job)
+        job = st.session_state["report_job"] = None
+
+    # Documents already built (by this or another session) are served straight away
+    documents = {fmt: exports.export_cache.get(export_key + (fmt,)) for fmt in ("docx", "html")}
+    if all(data is not None for data in documents.values()):
+        show_download_buttons(documents, course_name)
+        return
+
+    if job is None:
+        if not st.button("Build Word and HTML documents"):
+            return
+        try:
+            job = st.session_state["report_job"] = jobs.submit(export_key, build)
+        except jobs.QueueFull as e:
+            st.warning(f"The report builder is busy: {e}")
+            return
+
+    if job.state == jobs.DONE:
+        show_download_buttons(job.result, course_name)
+    elif job.state == jobs.FAILED:
+        st.error(f"Building the documents failed: {job.error}")
+        st.session_state["report_job"] = None
+    elif job.state == jobs.CANCELLED:
+        st.info("The document build was cancelled.")
+        st.session_state["report_job"] = None
+    else:
+        show_job_progress(job)
 
-    for para in paragraphs:
-        if para.startswith("##"):
-            html_content += f"<h2>{para[2:].strip()}</h2>"
-        elif para.startswith("#"):
-            html_content += f"<h1>{para[1:].strip()}</h1>"
-        else:
-            html_content += f"<p>{para.strip()}</p>"
-    
-    # Add images in HTML
-    for img_path in graph_image_paths:
-        html_content += f'<img src="{img_path}" style="width:100%;"/>'  # Embed images in the HTML
-    
-    html_content += "</body></html>"
-    return html_content
 # Step 9: Main Application Function to Integrate All Components
 def main():
     st.title("University Course Automation with Rankings")
+
+    # Optional per-stage timing/memory breakdown (also on by default with GYANDHAN_PROFILE=1)
+    profile = st.sidebar.toggle("Profile this run", value=profiling.ENABLED)
+    profiling.begin_run("gyandhantemp", profile)
     
     # Step 1: Handle file uploads for course and collection data
-    course_details = handle_file_uploads()
+    with profiling.stage("load_course_details"):
+        course_details, course_key = handle_file_uploads()
     
     # Step 2: Upload Collection Data file
-    collection_data_list = handle_collection_uploads()
+    with profiling.stage("load_collections"):
+        collection_data_list = handle_collection_uploads()
 
     # Step 3: Upload Third Excel File
     st.header("Upload University Details File")
@@ -278,9 +582,12 @@ def main():
     tuition_fees_data = None
     living_expenses_data = None
     deadlines_data = None
+    details_key = None
     
     if uploaded_details_file:
-        tuition_fees_data, living_expenses_data, deadlines_data = read_third_excel_file(uploaded_details_file)
+        details_key = ingest.workbook_digest(uploaded_details_file)
+        with profiling.stage("read_third_excel_file"):
+            tuition_fees_data, living_expenses_data, deadlines_data = read_third_excel_file(uploaded_details_file)
 
         # Display Tuition Fees Data
         if tuition_fees_data is not None:
@@ -298,60 +605,61 @@ def main():
             st.write(deadlines_data)
 
     if course_details is not None and collection_data_list:
-        # Step 4: Select Course and Country
-        course_name = st.selectbox("Select Course Name", course_details['Course Name'].unique())
-        country = st.selectbox("Select Country", course_details['Country'].unique())
+        # Step 4: Select Course and Country (only countries that offer the chosen course)
+        selection_index = selection.get_index(course_details, COURSE_SELECTION_COLUMNS, course_key)
+        course_name = st.selectbox("Select Course Name", selection_index.options('Course Name'))
+        country = st.selectbox("Select Country", selection_index.options('Country', {'Course Name': course_name}))
+
+        # Collections are sliced to the selected course and country unless all rows are wanted
+        include_all = st.checkbox("Include all collection rows (not only the selected course and country)")
+        report_collections = select_collections(collection_data_list, course_name, country, include_all)
         
         # Generate graph data for visualization
-        graph_data = generate_graph_data(course_details)  # Create graph data based on your requirements
+        with profiling.stage("generate_graph_data"):
+            graph_data = generate_graph_data(course_details)  # Create graph data based on your requirements
         
         # Generate final content
-        generated_content = generate_final_content(
-            course_details,
-            graph_data,
-            collection_data_list,
-            course_name,
-            country,
-            tuition_fees_data,
-            living_expenses_data,
-            deadlines_data
-        )
+        with profiling.stage("generate_final_content"):
+            report = build_report(
+                course_details,
+                report_collections,
+                course_name,
+                country,
+                tuition_fees_data,
+                living_expenses_data,
+                deadlines_data,
+                selection_index,
+                details_key
+            )
+            generated_content = render_markdown(report) if report is not None else ""
         
         # Step 5: Display Content
-        if generated_content:
+        if report is None:
+            st.error("No course details found for the selected course and country.")
+        else:
             st.subheader("Generated Content")
-            st.markdown(generated_content)
+            with profiling.stage("render_content", chars=len(generated_content)):
+                st.markdown(generated_content)
 
             # Step 6: Visualizations
+            figures = []
             if graph_data is not None and not graph_data.empty:
-                # Create Bar Plot
-                bar_fig = px.bar(graph_data, x='University Name', y='Tuition Fees (INR)',
-                                title='Tuition Fees by University')
-                st.plotly_chart(bar_fig)
-
-                # Create Scatter Plot
-                scatter_fig = px.scatter(graph_data, x='University Name', y='Tuition Fees (INR)',
-                                        size='Acceptance Rate (%)', hover_name='University Name',
-                                        title='Tuition Fees vs Acceptance Rate')
-                st.plotly_chart(scatter_fig)
-
-                # Save the plots as images for the Word document
-                bar_image_path = "/tmp/bar_plot.png"
-                scatter_image_path = "/tmp/scatter_plot.png"
-                save_plotly_fig_as_image(bar_fig, bar_image_path)
-                save_plotly_fig_as_image(scatter_fig, scatter_image_path)
-
-                # Pass the saved image paths to be included in the Word document later
-                graph_image_paths = [bar_image_path, scatter_image_path]
-            else:
-                graph_image_paths = []
-
-            # Step 7: Download Word and HTML
-            word_file = generate_word_with_images(generated_content, collection_data_list, graph_image_paths)
-            st.markdown(download_link(word_file.read(), f"{course_name}_complete_with_rankings.docx", "Download Word Document"), unsafe_allow_html=True)
-            
-            html_content = generate_html(generated_content, graph_image_paths)
-            st.markdown(download_link(html_content.encode(), f"{course_name}_complete_content.html", "Download HTML Document"), unsafe_allow_html=True)
+                with profiling.stage("plotly_chart"):
+                    figures = build_graph_figures(graph_data)
+                    for fig in figures:
+                        st.plotly_chart(fig)
+
+            # Step 7: Download Word and HTML. The documents (and chart images) are built by a background
+            # job on request, shared with identical in-flight requests and memoized per dataset and selection
+            export_key = (course_key, tuple(data["key"] for data in report_collections), details_key, course_name, country)
+            report_downloads(export_key, course_name, profiling.profiled("report_job", lambda job: build_report_documents(
+                job, export_key, report, generated_content, report_collections, figures)))
+
+    if profile:
+        panel = st.sidebar.expander("Profiling", expanded=True)
+        profiling.render_panel(panel)
+        panel.caption(registry.describe())
+        panel.caption(jobs.describe())
 
 if __name__ == "__main__":
     main()
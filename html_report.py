@@ -0,0 +1,170 @@
+# HTML export engine: reports are rendered by Jinja2 templates that are compiled once per
+# process and reused for every page. Sections and tables come from the structured report
+# data (not from re-parsing the Markdown), chart images are inlined as data URIs encoded
+# once per image, and pages are generated in chunks that are written out as they are
+# produced instead of being assembled into one string. jinja2 is imported on first use.
+import base64
+import hashlib
+import os
+import threading
+from io import BytesIO
+
+import lru
+
+IMAGE_CACHE_MAX_BYTES = int(os.environ.get("GYANDHAN_IMAGE_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+
+# Generated output is collected into chunks of about this many characters before it is written
+HTML_CHUNK_CHARS = 64 * 1024
+
+# Loops emit table rows straight into the output: a macro or {% set %} block would
+# render the whole table to a string first
+TEMPLATES = {
+    "report.html": """\
+<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{{ title }}</title>
+<style>
+body { font-family: sans-serif; max-width: 72em; margin: 2em auto; padding: 0 1em; color: #222; }
+table { border-collapse: collapse; width: 100%; margin: 1em 0; }
+th, td { border: 1px solid #ccc; padding: 0.3em 0.6em; text-align: left; vertical-align: top; }
+th { background: #f3f3f3; }
+img { width: 100%; }
+</style>
+</head>
+<body>
+<h1>{{ title }}</h1>
+
+<h2>Overview</h2>
+<p>{{ overview }}</p>
+{% if video_url %}
+<p>You can watch this video for more information: <a href="{{ video_url }}">Watch Video</a></p>
+{% endif %}
+
+<h2>Cost and Living Expenses</h2>
+<p>The cost of studying {{ course_name }} in {{ country }} ranges from <strong>{{ tuition_fees }}</strong> for tuition and approximately <strong>{{ living_expenses }}</strong> for living expenses per year.</p>
+<table>
+<thead><tr><th>Type</th><th>Amount (INR)</th></tr></thead>
+<tbody>
+<tr><td>Tuition Fees</td><td><strong>{{ tuition_fees }}</strong></td></tr>
+<tr><td>Living Expenses</td><td><strong>{{ living_expenses }}</strong></td></tr>
+</tbody>
+</table>
+
+<h2>Important Deadlines</h2>
+{% if deadlines %}
+<table>
+<thead><tr><th>Event</th><th>Date</th><th>Notes</th></tr></thead>
+<tbody>
+{% for event, date, notes in deadlines %}
+<tr><td>{{ event }}</td><td>{{ date }}</td><td>{{ notes }}</td></tr>
+{% endfor %}
+</tbody>
+</table>
+{% else %}
+<p>No important deadlines available.</p>
+{% endif %}
+
+{% for collection in collections %}
+<h2>{{ collection.name }}</h2>
+{% if collection.description %}
+<p>{{ collection.description }}</p>
+{% endif %}
+<table>
+<thead><tr><th>University Name</th><th>Tuition Fees (INR)</th><th>Acceptance Rate (%)</th><th>Application Link</th><th>Ranking</th></tr></thead>
+<tbody>
+{% for university, fees, rate, link, ranking in collection.rows %}
+<tr><td>{{ university }}</td><td>{{ fees }}</td><td>{{ rate }}</td><td>{% if link %}<a href="{{ link }}">Apply Here</a>{% else %}N/A{% endif %}</td><td>{{ ranking }}</td></tr>
+{% endfor %}
+</tbody>
+</table>
+{% endfor %}
+
+<h2>Job Prospects and Career Growth</h2>
+<p>{{ job_prospects }}</p>
+{% if images %}
+
+<h2>Graphs and Visualizations</h2>
+{% for src in images %}
+<img src="{{ src }}" alt="Chart {{ loop.index }}">
+{% endfor %}
+{% endif %}
+</body>
+</html>
+""",
+}
+
+image_cache = lru.BoundedCache(IMAGE_CACHE_MAX_BYTES)
+
+_environment = None
+_lock = threading.Lock()
+
+
+# Function to get the process-wide template environment, compiling every template on first use
+def environment():
+    global _environment
+    with _lock:
+        if _environment is None:
+            import jinja2
+
+            env = jinja2.Environment(
+                loader=jinja2.DictLoader(TEMPLATES),
+                autoescape=True,
+                trim_blocks=True,
+                lstrip_blocks=True,
+                auto_reload=False,
+                cache_size=-1,
+            )
+            # Templates live in this module, so they are compiled up front and never reloaded
+            for name in TEMPLATES:
+                env.get_template(name)
+            _environment = env
+        return _environment
+
+
+# Function to get the data URI of a PNG image, base64-encoded once per image content
+def image_uri(image):
+    if not isinstance(image, bytes):
+        return image
+    key = hashlib.sha1(image).hexdigest()
+    uri = image_cache.get(key)
+    if uri is None:
+        uri = "data:image/png;base64," + base64.b64encode(image).decode()
+        image_cache.put(key, uri)
+    return uri
+
+
+# Function to get the data URIs of a page's images, each image inlined only once
+def image_uris(images):
+    return list(dict.fromkeys(image_uri(image) for image in images))
+
+
+# Function to generate a template's output in chunks of about HTML_CHUNK_CHARS characters
+def stream(name, context, chunk_chars=HTML_CHUNK_CHARS):
+    parts = []
+    size = 0
+    for part in environment().get_template(name).generate(context):
+        parts.append(part)
+        size += len(part)
+        if size >= chunk_chars:
+            yield "".join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield "".join(parts)
+
+
+# Function to write a template's output to a binary file chunk by chunk; returns the bytes written
+def write(file, name, context):
+    written = 0
+    for chunk in stream(name, context):
+        written += file.write(chunk.encode())
+    return written
+
+
+# Function to render a template to UTF-8 bytes (for downloads and archives)
+def render(name, context):
+    buffer = BytesIO()
+    write(buffer, name, context)
+    return buffer.getvalue()
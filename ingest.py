@@ -0,0 +1,446 @@
+# Workbook ingestion layer: parse each uploaded workbook once per content hash
+# and serve every later rerun (and every other session) from a columnar snapshot.
+#
+# Sheets can also be read column-projected: the header row is checked first and,
+# for large workbooks, rows are streamed with openpyxl in read-only mode so only
+# the requested columns are ever materialized. openpyxl and the Parquet writer are only
+# imported once a workbook is first read.
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import lru
+
+# Cache settings can be tuned per deployment through the environment
+CACHE_DIR = os.environ.get("GYANDHAN_CACHE_DIR", os.path.join(tempfile.gettempdir(), "gyandhan_cache"))
+CACHE_MAX_BYTES = int(os.environ.get("GYANDHAN_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+CACHE_MAX_DISK_BYTES = int(os.environ.get("GYANDHAN_CACHE_MAX_DISK_BYTES", 2 * 1024 * 1024 * 1024))
+# How many upload digests and sheet-name lists are remembered across reruns
+METADATA_CACHE_SIZE = 256
+
+# Reader mode for projected reads: "stream" always streams with openpyxl, "pandas" always
+# parses the whole workbook, "auto" streams workbooks of at least STREAM_MIN_BYTES
+READER_MODE = os.environ.get("GYANDHAN_READER_MODE", "auto")
+STREAM_MIN_BYTES = int(os.environ.get("GYANDHAN_STREAM_MIN_BYTES", 32 * 1024 * 1024))
+STREAM_CHUNK_ROWS = 10000
+
+MANIFEST_NAME = "manifest.json"
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Strings pd.read_excel treats as missing values by default
+NA_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+             '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+
+# Raised when a sheet's header row lacks required columns
+class SchemaError(ValueError):
+    def __init__(self, sheet_name, missing_columns):
+        self.sheet_name = sheet_name
+        self.missing_columns = list(missing_columns)
+        super().__init__(f"Sheet '{sheet_name}' is missing required columns: {', '.join(map(str, self.missing_columns))}")
+
+
+# Function to get the raw bytes of an uploaded file, a path or a file-like object
+def read_source_bytes(source):
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read()
+    source.seek(0)
+    data = source.read()
+    source.seek(0)
+    return data
+
+
+# Function to get something pandas/openpyxl can open without reading a path into memory
+def _open_source(source):
+    if isinstance(source, (str, os.PathLike)):
+        return source
+    return BytesIO(read_source_bytes(source))
+
+
+# Function to get the size of a source in bytes
+def source_size(source):
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    if hasattr(source, "size"):
+        return source.size
+    return len(read_source_bytes(source))
+
+
+# Function to compute the content hash used as the cache key
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+# Function to hash a file on disk block by block
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Function to measure how much memory a cached sheet holds
+def _sheet_nbytes(sheet):
+    if isinstance(sheet, pa.Table):
+        return sheet.nbytes
+    return int(sheet.memory_usage(deep=True).sum())
+
+
+# Function to measure how much memory a cached workbook (its sheets) holds
+def _workbook_nbytes(sheets):
+    return sum(_sheet_nbytes(sheet) for sheet in sheets.values())
+
+
+# Function to turn a parsed sheet into an Arrow table (None if the sheet has mixed-type columns)
+def _to_arrow(df):
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return None
+
+
+# Function to name header cells the way pd.read_excel does (blank and duplicate headers)
+def _header_names(header):
+    names = []
+    seen = {}
+    for i, value in enumerate(header):
+        name = f"Unnamed: {i}" if value is None else value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+# Function to pick the header positions to keep and check required columns against them
+def _project(sheet_name, names, columns=None, exclude=None, required=None):
+    missing_columns = [col for col in (required or []) if col not in names]
+    if missing_columns:
+        raise SchemaError(sheet_name, missing_columns)
+    if columns is not None:
+        positions = {name: i for i, name in enumerate(names)}
+        return [positions[col] for col in columns if col in positions]
+    excluded = set(exclude or [])
+    return [i for i, name in enumerate(names) if name not in excluded]
+
+
+# Function to convert a cell value the way pandas' openpyxl reader does
+def _cell_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+# Function to stream one sheet as DataFrame chunks holding only the projected columns
+#
+# The header row is read and validated before any data row, so a SchemaError is
+# raised on the first next() call without parsing the rest of the sheet.
+def iter_sheet_chunks(source, sheet_name=0, columns=None, exclude=None, required=None, chunk_rows=STREAM_CHUNK_ROWS):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(_open_source(source), read_only=True, data_only=True)
+    try:
+        worksheet = workbook.worksheets[sheet_name] if isinstance(sheet_name, int) else workbook[sheet_name]
+        rows = worksheet.iter_rows(values_only=True)
+        names = _header_names(next(rows, ()))
+        positions = _project(worksheet.title, names, columns, exclude, required)
+        projected_names = [names[i] for i in positions]
+
+        chunk = []
+        for values in _data_rows(rows, positions):
+            chunk.append(values)
+            if len(chunk) == chunk_rows:
+                yield _chunk_frame(chunk, projected_names)
+                chunk = []
+        if chunk or not projected_names:
+            yield _chunk_frame(chunk, projected_names)
+    finally:
+        workbook.close()
+
+
+# Function to yield the projected cells of each data row, keeping rows as pd.read_excel does:
+# whether a row is blank is decided on the whole row, and blank rows become all-NaN rows
+# unless they trail at the end of the sheet
+def _data_rows(rows, positions):
+    blank_rows = 0
+    for row in rows:
+        if all(value is None for value in row):
+            blank_rows += 1
+            continue
+        for _ in range(blank_rows):
+            yield [None] * len(positions)
+        blank_rows = 0
+        yield [_cell_value(row[i]) if i < len(row) else None for i in positions]
+
+
+def _chunk_frame(chunk, names):
+    df = pd.DataFrame(chunk, columns=names)
+    if not len(df):
+        return df
+    df = df.replace(NA_VALUES, np.nan)
+    # Blank cells are NaN, as pd.read_excel gives them, not None (which object columns keep)
+    return df.where(df.notna(), np.nan)
+
+
+class WorkbookCache:
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, cache_dir=CACHE_DIR, max_disk_bytes=CACHE_MAX_DISK_BYTES):
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        # cache key -> OrderedDict(sheet name -> Arrow table or DataFrame), bounded by sheet memory
+        self._entries = lru.BoundedCache(max_bytes, sizeof=_workbook_nbytes)
+        self._digests = OrderedDict()  # Streamlit file_id -> digest, so reruns skip rehashing
+        self._sheet_names = OrderedDict()  # digest -> sheet names read without parsing the workbook
+        self._lock = threading.Lock()
+        self._parse_locks = {}
+
+    # Function to get the content hash of a source, memoized per uploaded file
+    def digest(self, source):
+        file_id = getattr(source, "file_id", None)
+        if file_id is not None:
+            digest = self._recall(self._digests, file_id)
+            if digest is not None:
+                return digest
+        if isinstance(source, (str, os.PathLike)):
+            digest = _file_hash(source)
+        else:
+            digest = content_hash(read_source_bytes(source))
+        if file_id is not None:
+            self._remember(self._digests, file_id, digest)
+        return digest
+
+    # Function to get every sheet of a workbook, parsing it at most once per content hash
+    def sheets(self, source):
+        digest = self.digest(source)
+        return digest, self._load(digest, lambda: self._parse(source))
+
+    # Function to list the sheet names of a workbook
+    def sheet_names(self, source):
+        digest = self.digest(source)
+        sheets = self._get(digest)
+        if sheets is None and self._streams(source):
+            names = self._recall(self._sheet_names, digest)
+            if names is None:
+                from openpyxl import load_workbook
+                workbook = load_workbook(_open_source(source), read_only=True)
+                names = list(workbook.sheetnames)
+                workbook.close()
+                self._remember(self._sheet_names, digest, names)
+            return list(names)
+        _, sheets = self.sheets(source)
+        return list(sheets)
+
+    # Function to read one sheet (by name or position) as a fresh DataFrame
+    #
+    # With `columns` (keep these, when present) or `exclude` (drop these) the sheet is
+    # projected, and `required` columns are checked against the header first.
+    def read_sheet(self, source, sheet_name=0, columns=None, exclude=None, required=None):
+        if columns is None and exclude is None and required is None:
+            return _to_frame(self._sheet(self.sheets(source)[1], sheet_name))
+
+        digest = self.digest(source)
+        sheets = self._get(digest)
+        if sheets is None and self._streams(source):
+            if isinstance(sheet_name, int):
+                sheet_name = self.sheet_names(source)[sheet_name]
+            spec = json.dumps([sheet_name, columns, exclude, required], default=str)
+            key = f"{digest}-{content_hash(spec.encode())[:16]}"
+            sheets = self._load(key, lambda: self._stream(source, sheet_name, columns, exclude, required))
+            return _to_frame(sheets[sheet_name])
+
+        if sheets is None:
+            _, sheets = self.sheets(source)
+        sheet = self._sheet(sheets, sheet_name)
+        names = sheet.column_names if isinstance(sheet, pa.Table) else list(sheet.columns)
+        positions = _project(sheet_name, names, columns, exclude, required)
+        if isinstance(sheet, pa.Table):
+            return sheet.select(positions).to_pandas()
+        return sheet.iloc[:, positions].copy()
+
+    # Function to drop everything held in memory (snapshots on disk are kept)
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._digests.clear()
+            self._sheet_names.clear()
+
+    # Function to look up a remembered upload digest or sheet-name list
+    def _recall(self, mapping, key):
+        with self._lock:
+            value = mapping.get(key)
+            if value is not None:
+                mapping.move_to_end(key)
+            return value
+
+    # Function to remember a digest or sheet-name list, forgetting the oldest past METADATA_CACHE_SIZE
+    def _remember(self, mapping, key, value):
+        with self._lock:
+            mapping[key] = value
+            mapping.move_to_end(key)
+            while len(mapping) > METADATA_CACHE_SIZE:
+                mapping.popitem(last=False)
+
+    def _streams(self, source):
+        if READER_MODE == "stream":
+            return True
+        return READER_MODE == "auto" and source_size(source) >= STREAM_MIN_BYTES
+
+    def _sheet(self, sheets, sheet_name):
+        if isinstance(sheet_name, int):
+            sheet_name = list(sheets)[sheet_name]
+        return sheets[sheet_name]
+
+    def _load(self, key, parse):
+        sheets = self._get(key)
+        if sheets is not None:
+            return sheets
+
+        # Only one thread parses a given workbook; the others wait for its result
+        with self._lock:
+            parse_lock = self._parse_locks.setdefault(key, threading.Lock())
+        with parse_lock:
+            sheets = self._get(key)
+            if sheets is None:
+                sheets = self._load_snapshot(key)
+                if sheets is None:
+                    sheets = parse()
+                    self._write_snapshot(key, sheets)
+                self._put(key, sheets)
+        with self._lock:
+            self._parse_locks.pop(key, None)
+        return sheets
+
+    @property
+    def max_bytes(self):
+        return self._entries.max_bytes
+
+    # Memory held by the cached workbooks
+    @property
+    def nbytes(self):
+        return self._entries.nbytes
+
+    def _get(self, key):
+        return self._entries.get(key)
+
+    # Least recently used workbooks are evicted once the cache is over budget
+    def _put(self, key, sheets):
+        self._entries.put(key, sheets)
+
+    def _parse(self, source):
+        frames = pd.read_excel(_open_source(source), sheet_name=None)
+        sheets = OrderedDict()
+        for sheet_name, df in frames.items():
+            table = _to_arrow(df)
+            sheets[sheet_name] = table if table is not None else df
+        return sheets
+
+    def _stream(self, source, sheet_name, columns, exclude, required):
+        chunks = list(iter_sheet_chunks(source, sheet_name, columns, exclude, required))
+        df = pd.concat(chunks, ignore_index=True).infer_objects() if len(chunks) > 1 else chunks[0]
+        table = _to_arrow(df)
+        return OrderedDict([(sheet_name, table if table is not None else df)])
+
+    def _snapshot_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def _load_snapshot(self, key):
+        import pyarrow.parquet as pq
+
+        snapshot_dir = self._snapshot_dir(key)
+        try:
+            with open(os.path.join(snapshot_dir, MANIFEST_NAME)) as f:
+                manifest = json.load(f)
+            sheets = OrderedDict()
+            for i, sheet_name in enumerate(manifest["sheets"]):
+                sheets[sheet_name] = pq.read_table(os.path.join(snapshot_dir, f"{i}.parquet"), memory_map=True)
+            os.utime(snapshot_dir)
+        except (OSError, ValueError, KeyError, pa.ArrowException):
+            return None
+        return sheets
+
+    def _write_snapshot(self, key, sheets):
+        # Sheets that could not be stored as Arrow stay in memory only
+        if not all(isinstance(sheet, pa.Table) for sheet in sheets.values()):
+            return
+        snapshot_dir = self._snapshot_dir(key)
+        if os.path.isdir(snapshot_dir):
+            return
+        import pyarrow.parquet as pq
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_dir = tempfile.mkdtemp(prefix=f".{key}-", dir=self.cache_dir)
+            for i, table in enumerate(sheets.values()):
+                pq.write_table(table, os.path.join(tmp_dir, f"{i}.parquet"))
+            with open(os.path.join(tmp_dir, MANIFEST_NAME), "w") as f:
+                json.dump({"sheets": list(sheets)}, f)
+            try:
+                os.rename(tmp_dir, snapshot_dir)
+            except OSError:
+                # Another process finished the same snapshot first
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            self._prune_snapshots()
+        except OSError:
+            return
+
+    def _prune_snapshots(self):
+        # Remove least recently used snapshots once the disk budget is exceeded
+        snapshots = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+            snapshots.append((os.stat(path).st_mtime, size, path))
+            total += size
+        for _, size, path in sorted(snapshots):
+            if total <= self.max_disk_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+
+# Function to hand out a fresh DataFrame for a cached sheet
+def _to_frame(sheet):
+    if isinstance(sheet, pa.Table):
+        return sheet.to_pandas()
+    return sheet.copy()
+
+
+# Process-wide cache shared by all reruns and sessions
+workbook_cache = WorkbookCache()
+
+
+# Function to get the content hash of an uploaded workbook
+def workbook_digest(source):
+    return workbook_cache.digest(source)
+
+
+# Function to list all sheets in an uploaded workbook
+def sheet_names(source):
+    return workbook_cache.sheet_names(source)
+
+
+# Function to read one sheet of an uploaded workbook, optionally column-projected
+def read_sheet(source, sheet_name=0, columns=None, exclude=None, required=None):
+    return workbook_cache.read_sheet(source, sheet_name, columns, exclude, required)
+
+
+# Function to get a key identifying one sheet of a workbook by content, for caching derived data
+def sheet_key(source, sheet_name=0):
+    return f"{workbook_digest(source)}:{sheet_name}"
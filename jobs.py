@@ -0,0 +1,148 @@
+# Background job queue: long report builds run on a bounded worker pool instead of the
+# Streamlit script thread. Jobs are identified by the key of what they build, so identical
+# in-flight requests (double clicks, other sessions) share one job; jobs report progress
+# for the UI to poll and stop at their next checkpoint once every requester has left.
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_WORKERS = int(os.environ.get("GYANDHAN_JOB_WORKERS", 2))
+# Queued (not yet running) jobs allowed before new submissions are refused
+JOB_MAX_PENDING = int(os.environ.get("GYANDHAN_JOB_MAX_PENDING", 16))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+# Raised inside a job at a progress checkpoint after it has been cancelled
+class JobCancelled(Exception):
+    pass
+
+
+# Raised when too many jobs are waiting for a worker
+class QueueFull(RuntimeError):
+    pass
+
+
+class Job:
+    def __init__(self, key, fn):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.fn = fn
+        self.state = QUEUED
+        self.progress = 0.0
+        self.message = "Waiting for a worker"
+        self.result = None
+        self.error = None
+        self.requesters = 0
+        self.future = None
+        self._cancelled = threading.Event()
+
+    # Function for the job body to report progress (0..1); also the cancellation checkpoint
+    def report(self, progress, message=None):
+        if self._cancelled.is_set():
+            raise JobCancelled(self.id)
+        self.progress = min(max(progress, 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+    @property
+    def finished(self):
+        return self.state in (DONE, FAILED, CANCELLED)
+
+    def __repr__(self):
+        return f"Job({self.id}, {self.key!r}, {self.state})"
+
+
+class JobQueue:
+    def __init__(self, max_workers=JOB_WORKERS, max_pending=JOB_MAX_PENDING):
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gyandhan-job")
+        self._active = {}  # key -> queued or running job
+        self._lock = threading.Lock()
+
+    # Function to start `fn(job)` in the background, or join the identical job already in flight
+    def submit(self, key, fn):
+        with self._lock:
+            job = self._active.get(key)
+            # A job that is being cancelled can't be joined; a fresh one replaces it
+            if job is None or job._cancelled.is_set():
+                pending = sum(1 for active in self._active.values() if active.state == QUEUED)
+                if pending >= self.max_pending:
+                    raise QueueFull(f"{pending} jobs are already waiting; try again shortly")
+                job = Job(key, fn)
+                self._active[key] = job
+                job.future = self._pool.submit(self._run, job)
+            job.requesters += 1
+            return job
+
+    # Function for a requester to give up on a job (e.g. its selection changed); the job is
+    # cancelled once nobody is waiting for it any more
+    def abandon(self, job):
+        with self._lock:
+            job.requesters = max(job.requesters - 1, 0)
+            if job.requesters or job.finished:
+                return
+            job._cancelled.set()
+            if job.future.cancel():
+                self._finish(job, CANCELLED, "Cancelled")
+
+    def _run(self, job):
+        job.state = RUNNING
+        job.message = "Starting"
+        try:
+            job.report(0.0)
+            result = job.fn(job)
+        except JobCancelled:
+            with self._lock:
+                self._finish(job, CANCELLED, "Cancelled")
+        except Exception as e:  # noqa: BLE001 - the error is shown to whoever polls the job
+            job.error = e
+            with self._lock:
+                self._finish(job, FAILED, f"Failed: {e}")
+        else:
+            job.result = result
+            job.progress = 1.0
+            with self._lock:
+                self._finish(job, DONE, "Done")
+
+    # Called with the lock held
+    def _finish(self, job, state, message):
+        job.state = state
+        job.message = message
+        job.fn = None
+        # Requesters keep their own reference to poll the outcome
+        if self._active.get(job.key) is job:
+            del self._active[job.key]
+
+    # Function to count jobs by state, for monitoring
+    def stats(self):
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0}
+            for job in self._active.values():
+                counts[job.state] = counts.get(job.state, 0) + 1
+            return counts
+
+
+# Process-wide queue shared by all sessions
+queue = JobQueue()
+
+
+# Function to submit a job to the shared queue (see JobQueue.submit)
+def submit(key, fn):
+    return queue.submit(key, fn)
+
+
+# Function to give up on a job in the shared queue (see JobQueue.abandon)
+def abandon(job):
+    queue.abandon(job)
+
+
+# Function to summarize the shared queue in one line
+def describe():
+    stats = queue.stats()
+    return f"Report jobs: {stats[RUNNING]} running, {stats[QUEUED]} queued (of {queue.max_pending})"
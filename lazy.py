@@ -0,0 +1,29 @@
+# Deferred imports for the apps: a module proxy imports the real module on first attribute
+# access, so an app renders its upload page before pandas, pyarrow and friends are loaded.
+import importlib
+
+
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    # Function to import the module on first use (Python's import lock makes concurrent first
+    # use from several sessions safe)
+    def _load(self):
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+# Function to get a proxy for a module that is imported when first used
+def module(name):
+    return LazyModule(name)
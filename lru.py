@@ -0,0 +1,46 @@
+# Thread-safe LRU cache bounded by the total size of its values rather than their count.
+import threading
+from collections import OrderedDict
+
+
+class BoundedCache:
+    def __init__(self, max_bytes, sizeof=len):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._values = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._values.get(key)
+            if value is not None:
+                self._values.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._values or size > self.max_bytes:
+                return
+            self._values[key] = value
+            self._sizes[key] = size
+            self._bytes += size
+            # Evict least recently used values until we are back under budget
+            while self._bytes > self.max_bytes:
+                old_key, _ = self._values.popitem(last=False)
+                self._bytes -= self._sizes.pop(old_key)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._values)
+
+    @property
+    def nbytes(self):
+        return self._bytes
@@ -0,0 +1,117 @@
+# Aggregating matplotlib charts for the filter app: data is binned or summarized before
+# drawing so no chart has more than MAX_MARKS bars, each chart is drawn on its own Figure
+# (no pyplot global state, nothing left open across reruns) and the PNG is cached per
+# (dataset, selection, column, aggregation).
+import os
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+import lru
+
+PLOT_CACHE_MAX_BYTES = int(os.environ.get("GYANDHAN_PLOT_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+
+# Upper bound on the bars drawn by any chart
+MAX_MARKS = 50
+
+# Aggregation modes offered in the UI, with their labels
+AGGREGATIONS = {
+    "histogram": "Histogram",
+    "top": f"Top {MAX_MARKS} rows",
+    "group": "Average per college",
+    "rows": "Row values (sampled)",
+}
+
+plot_cache = lru.BoundedCache(PLOT_CACHE_MAX_BYTES)
+
+
+# Function to bin a column into at most MAX_MARKS equal-width bins
+def histogram(values):
+    # No values, no bins (np.histogram would still make one empty 0–1 bin)
+    if values.empty:
+        return pd.Series(dtype=float)
+    bins = min(MAX_MARKS, max(1, values.nunique()))
+    counts, edges = np.histogram(values.to_numpy(dtype=float), bins=bins)
+    labels = [f"{low:g}–{high:g}" for low, high in zip(edges[:-1], edges[1:])]
+    return pd.Series(counts, index=labels)
+
+
+# Function to keep the MAX_MARKS largest values, labelled by `label` when the frame has it
+def top_values(df, column, label=None):
+    top = df.nlargest(MAX_MARKS, column)
+    if label in df.columns:
+        return pd.Series(top[column].to_numpy(), index=top[label].astype(str).to_numpy())
+    return top[column]
+
+
+# Function to average a column per group and keep the MAX_MARKS highest groups
+def group_means(df, column, group):
+    means = df.groupby(group, observed=True, sort=False)[column].mean().dropna()
+    return means.nlargest(MAX_MARKS)
+
+
+# Function to sample at most MAX_MARKS row values, evenly spaced and in row order
+def sampled_rows(values):
+    if len(values) <= MAX_MARKS:
+        return values
+    positions = np.linspace(0, len(values) - 1, MAX_MARKS).round().astype(int)
+    return values.iloc[positions]
+
+
+# Function to reduce a column to the (label -> value) series a chart draws
+def aggregate(df, column, aggregation, group=None):
+    valid = df.dropna(subset=[column])
+    if aggregation == "histogram":
+        return histogram(valid[column])
+    if aggregation == "top":
+        return top_values(valid, column, group)
+    if aggregation == "group":
+        if group not in valid.columns:
+            raise ValueError(f"Cannot group by missing column '{group}'")
+        return group_means(valid, column, group)
+    if aggregation == "rows":
+        return sampled_rows(valid[column])
+    raise ValueError(f"Unknown aggregation '{aggregation}'; expected one of {', '.join(AGGREGATIONS)}")
+
+
+# Function to draw an aggregated series as a bar chart and return it as PNG bytes
+def render_bars(series, title, xlabel, ylabel):
+    # matplotlib is imported on first use, keeping it out of the app's cold start
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.bar(range(len(series)), series.to_numpy(dtype=float), color='skyblue')
+    ax.set_xticks(range(len(series)))
+    ax.set_xticklabels([str(label) for label in series.index], rotation=90, fontsize=8)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    fig.tight_layout()
+    buffer = BytesIO()
+    fig.savefig(buffer, format="png")
+    # A bare Figure is not registered with pyplot, so dropping it frees everything
+    fig.clear()
+    return buffer.getvalue()
+
+
+# Function to get the PNG of a column's chart, drawn once per cache key
+#
+# Returns None when the column has nothing to plot.
+def chart_png(df, column, aggregation, group=None, cache_key=None):
+    key = None if cache_key is None else (cache_key, column, aggregation, group)
+    if key is not None:
+        png = plot_cache.get(key)
+        if png is not None:
+            return png
+
+    series = aggregate(df, column, aggregation, group)
+    if series.empty:
+        return None
+    ylabel = {"histogram": "Rows", "group": f"Average {column}"}.get(aggregation, column)
+    xlabel = {"histogram": column, "group": group, "top": group}.get(aggregation) or "Row"
+    png = render_bars(series, f"{AGGREGATIONS[aggregation]} of {column}", xlabel, ylabel)
+    if key is not None:
+        plot_cache.put(key, png)
+    return png
@@ -0,0 +1,146 @@
+# Per-stage profiling: wall time and RSS around each pipeline step, one structured JSON log
+# line per stage, and a per-rerun breakdown the apps can show in the sidebar. Off by default
+# (set GYANDHAN_PROFILE=1 or use the sidebar toggle); when off, stage() hands back a shared
+# no-op context manager, so the probes cost a thread-local lookup.
+import contextlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ENABLED = os.environ.get("GYANDHAN_PROFILE", "").lower() in ("1", "true", "yes", "on")
+
+logger = logging.getLogger("gyandhan.profile")
+
+# Streamlit runs each session's script in its own thread, so runs are tracked per thread
+_local = threading.local()
+_noop = contextlib.nullcontext()
+_handler_lock = threading.Lock()
+
+
+# Function to send the JSON lines to stderr unless the host application configured logging
+def _ensure_handler():
+    with _handler_lock:
+        if logger.handlers or logging.getLogger().handlers:
+            return
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+# Function to read the process' peak RSS in MiB (ru_maxrss is KiB on Linux, bytes on macOS)
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# Function to read the process' current RSS in MiB, where /proc is available
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+# Function to start a new profiled run on this thread (e.g. one Streamlit rerun)
+def begin_run(app, enabled=None):
+    _local.enabled = ENABLED if enabled is None else enabled
+    _local.app = app
+    _local.records = []
+    if _local.enabled:
+        _ensure_handler()
+
+
+# Function to check whether the current thread is being profiled
+def enabled():
+    return getattr(_local, "enabled", ENABLED)
+
+
+# Function to get the stage records collected so far in the current run
+def records():
+    return list(getattr(_local, "records", ()))
+
+
+@contextlib.contextmanager
+def _measure(name, fields):
+    rss_before = _rss_mb()
+    peak_before = _peak_rss_mb()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        peak_after = _peak_rss_mb()
+        rss_after = _rss_mb()
+        record = {
+            "event": "stage",
+            "app": getattr(_local, "app", None),
+            "stage": name,
+            "seconds": round(time.perf_counter() - start, 6),
+            "rss_mb": None if rss_after is None else round(rss_after, 1),
+            "rss_delta_mb": None if rss_after is None or rss_before is None else round(rss_after - rss_before, 1),
+            "peak_rss_mb": None if peak_after is None else round(peak_after, 1),
+            "peak_delta_mb": None if peak_after is None else round(peak_after - peak_before, 1),
+        }
+        if error:
+            record["error"] = error
+        record.update(fields)
+        if enabled() and hasattr(_local, "records"):
+            _local.records.append(record)
+        logger.info(json.dumps(record, default=str))
+
+
+# Function to time one pipeline step: `with profiling.stage("filter_data"): ...`
+#
+# Extra keyword fields (row counts, formats, ...) are added to the log line.
+def stage(name, **fields):
+    if not enabled():
+        return _noop
+    return _measure(name, fields)
+
+
+# Function to wrap a callable so every call is profiled as one stage (for deferred work such
+# as on-click exports, which run outside the rerun that created them)
+def profiled(name, fn, **fields):
+    if not enabled():
+        return fn
+    fields = dict(fields, app=getattr(_local, "app", None), deferred=True)
+
+    def wrapper(*args, **kwargs):
+        with _measure(name, fields):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+# Function to show the breakdown of the current run in a Streamlit container (e.g. st.sidebar)
+def render_panel(container):
+    rows = records()
+    if not rows:
+        container.caption("No stages recorded in this run.")
+        return
+    total = sum(row["seconds"] for row in rows)
+    container.caption(f"{len(rows)} stages, {total * 1000:.0f} ms total")
+    container.dataframe(
+        [{"stage": row["stage"],
+          "ms": round(row["seconds"] * 1000, 1),
+          "share": f"{row['seconds'] / total:.0%}" if total else "-",
+          "rss MiB": row["rss_mb"],
+          "peak +MiB": row["peak_delta_mb"]} for row in rows],
+        hide_index=True,
+    )
@@ -0,0 +1,178 @@
+# Process-wide dataset registry: loaded (and normalized) datasets are shared read-only by
+# every Streamlit session that uploads the same content, instead of each session keeping
+# its own copy. Sessions hold handles; a dataset stays pinned while any handle to it is
+# alive and is evicted least-recently-used once unreferenced and over the memory budget.
+#
+# Frames handed out by the registry are shared: callers must not modify them in place
+# (pandas copy-on-write, the default from 3.0 on, keeps derived frames independent).
+#
+# The registry budget covers the loaded datasets only. The parsed workbooks they are read
+# from are held separately by ingest.workbook_cache (Arrow copies of the raw sheets) under
+# its own GYANDHAN_CACHE_MAX_BYTES budget; describe() reports both.
+import os
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+
+import compact
+import ingest
+
+REGISTRY_MAX_BYTES = int(os.environ.get("GYANDHAN_REGISTRY_MAX_BYTES", 1024 * 1024 * 1024))
+
+
+# Function to measure the memory held by a dataset (a frame or a container of frames)
+def dataset_nbytes(value):
+    if isinstance(value, pd.DataFrame):
+        return compact.frame_nbytes(value)
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True, index=False))
+    if isinstance(value, (list, tuple)):
+        return sum(dataset_nbytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(dataset_nbytes(item) for item in value.values())
+    return sys.getsizeof(value)
+
+
+# A session's reference to a registered dataset; the reference is released when the handle
+# is garbage collected (e.g. replaced in st.session_state or dropped with the session)
+class Handle:
+    def __init__(self, key, value):
+        self.key = key
+        self.value = value
+
+    def __repr__(self):
+        return f"Handle({self.key!r})"
+
+
+class _Entry:
+    __slots__ = ("value", "nbytes", "refs")
+
+    def __init__(self, value, nbytes):
+        self.value = value
+        self.nbytes = nbytes
+        self.refs = 0
+
+
+class DatasetRegistry:
+    def __init__(self, max_bytes=REGISTRY_MAX_BYTES, sizeof=dataset_nbytes):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> _Entry, least recently used first
+        self._bytes = 0
+        # Reentrant: a handle can be garbage collected (and released) while the lock is held
+        self._lock = threading.RLock()
+        self._load_locks = {}
+
+    # Function to get a handle to a dataset, loading it with `load()` only if no session has it
+    #
+    # A handle the caller already holds for `key` (one of `held`, e.g. kept from the previous
+    # rerun) is returned as is, so the hit counter counts datasets shared between sessions
+    # rather than reruns of one session.
+    def acquire(self, key, load, held=()):
+        for handle in held:
+            if handle is not None and handle.key == key:
+                return handle
+
+        handle = self._acquire(key)
+        if handle is not None:
+            return handle
+
+        # Concurrent sessions uploading the same file wait for a single load
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        try:
+            with load_lock:
+                handle = self._acquire(key)
+                if handle is None:
+                    value = load()
+                    with self._lock:
+                        self.misses += 1
+                        entry = self._entries.get(key)
+                        if entry is None:
+                            entry = self._entries[key] = _Entry(value, self.sizeof(value))
+                            self._bytes += entry.nbytes
+                        handle = self._handle(key, entry)
+                        self._evict()
+        finally:
+            with self._lock:
+                self._load_locks.pop(key, None)
+        return handle
+
+    def _acquire(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._handle(key, entry)
+
+    # Called with the lock held
+    def _handle(self, key, entry):
+        entry.refs += 1
+        handle = Handle(key, entry.value)
+        weakref.finalize(handle, self._release, key, entry)
+        return handle
+
+    def _release(self, key, entry):
+        with self._lock:
+            entry.refs -= 1
+            if entry.refs == 0:
+                self._evict()
+
+    # Function to evict unreferenced datasets, least recently used first, until under budget
+    # (called with the lock held; datasets still referenced by a session are never evicted)
+    def _evict(self):
+        if self._bytes <= self.max_bytes:
+            return
+        for key in [key for key, entry in self._entries.items() if entry.refs == 0]:
+            entry = self._entries.pop(key)
+            self._bytes -= entry.nbytes
+            self.evictions += 1
+            if self._bytes <= self.max_bytes:
+                break
+
+    # Function to drop every unreferenced dataset
+    def clear(self):
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry.refs == 0]:
+                self._bytes -= self._entries.pop(key).nbytes
+
+    # Function to report the registry's size and hit/miss/eviction counters
+    def stats(self):
+        with self._lock:
+            return {
+                "datasets": len(self._entries),
+                "referenced": sum(1 for entry in self._entries.values() if entry.refs),
+                "handles": sum(entry.refs for entry in self._entries.values()),
+                "nbytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Process-wide registry shared by all sessions
+datasets = DatasetRegistry()
+
+
+# Function to get a handle to a shared dataset (see DatasetRegistry.acquire)
+def acquire(key, load, held=()):
+    return datasets.acquire(key, load, held)
+
+
+# Function to summarize the registry counters in one line
+def describe():
+    stats = datasets.stats()
+    return (f"Shared datasets: {stats['datasets']} ({stats['referenced']} in use), "
+            f"{stats['nbytes'] / (1024 * 1024):.1f} of {stats['max_bytes'] / (1024 * 1024):.0f} MB; "
+            f"{stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions; "
+            f"workbook cache {ingest.workbook_cache.nbytes / (1024 * 1024):.1f} of "
+            f"{ingest.workbook_cache.max_bytes / (1024 * 1024):.0f} MB")
@@ -0,0 +1,77 @@
+# Section-level report cache. Each report section is rendered once per explicit dependency
+# key (the content keys of the data it reads) and reused across selections, so changing the
+# course or country only re-renders the sections that actually depend on it.
+import hashlib
+import os
+
+import lru
+
+SECTION_CACHE_MAX_BYTES = int(os.environ.get("GYANDHAN_SECTION_CACHE_MAX_BYTES", 128 * 1024 * 1024))
+
+# DOCX paragraphs shorter than this are cheaper to rebuild than to look up
+MIN_CACHED_PARAGRAPH_CHARS = 2000
+
+
+# Function to size cached sections; non-text values (e.g. totals) count as a small constant
+def _section_size(value):
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return 64
+
+
+section_cache = lru.BoundedCache(SECTION_CACHE_MAX_BYTES, sizeof=_section_size)
+
+
+# Function to check that every part of a dependency key is known; otherwise nothing is cached
+def _cacheable(key):
+    return key is not None and all(part is not None for part in key)
+
+
+# Function to render a section once per dependency key
+def cached(key, render):
+    if not _cacheable(key):
+        return render()
+    value = section_cache.get(key)
+    if value is None:
+        value = render()
+        section_cache.put(key, value)
+    return value
+
+
+# Function to append an XML block element (paragraph or table) to the end of a document body
+def _append_block(doc, element):
+    from docx.oxml.ns import qn
+
+    body = doc.element.body
+    sect_pr = body.find(qn('w:sectPr'))
+    if sect_pr is not None:
+        sect_pr.addprevious(element)
+    else:
+        body.append(element)
+
+
+# Function to add a DOCX block once per dependency key and replay its XML on later documents
+#
+# `build(doc)` must add exactly one block to `doc` and return its XML element.
+def add_cached_block(doc, key, build):
+    from docx.oxml import parse_xml
+    from lxml import etree
+
+    if not _cacheable(key):
+        return build(doc)
+    xml = section_cache.get(key)
+    if xml is None:
+        element = build(doc)
+        section_cache.put(key, etree.tostring(element))
+        return element
+    element = parse_xml(xml)
+    _append_block(doc, element)
+    return element
+
+
+# Function to add a paragraph, reusing the XML of long paragraphs seen before
+def add_paragraph(doc, text):
+    if len(text) < MIN_CACHED_PARAGRAPH_CHARS:
+        return doc.add_paragraph(text)._p
+    key = ("docx_paragraph", hashlib.sha1(text.encode()).hexdigest())
+    return add_cached_block(doc, key, lambda doc: doc.add_paragraph(text)._p)
@@ -0,0 +1,98 @@
+# Precomputed selection index: maps the values of a few key columns to row positions
+# once per dataset, so filters and dependent selectbox options never rescan the frame.
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# How many dataset indexes are kept around for reuse across reruns
+INDEX_CACHE_SIZE = 32
+
+_EMPTY = np.array([], dtype=np.intp)
+
+
+class SelectionIndex:
+    def __init__(self, df, columns):
+        self.columns = list(columns)
+        self.length = len(df)
+
+        # Row positions per value of each single key column
+        self._single = {}
+        for column in self.columns:
+            groups = df.groupby(column, sort=False, observed=True).indices
+            self._single[column] = _by_first_row(groups)
+
+        # Row positions per full combination of key columns
+        if len(self.columns) > 1:
+            groups = df.groupby(self.columns, sort=False, observed=True).indices
+            self._combos = _by_first_row(groups)
+        else:
+            self._combos = {(key,): rows for key, rows in self._single[self.columns[0]].items()}
+
+        self._options = {}
+
+    # Function to get the row positions matching a selection; unset (None) columns match everything
+    def rows(self, selection=None):
+        selected = _selected(selection)
+        if not selected:
+            return slice(None)
+        if len(selected) == len(self.columns):
+            key = tuple(selected[column] for column in self.columns)
+            return self._combos.get(key, _EMPTY)
+        positions = None
+        for column, value in selected.items():
+            rows = self._single[column].get(value, _EMPTY)
+            positions = rows if positions is None else np.intersect1d(positions, rows, assume_unique=True)
+        return positions
+
+    # Function to list the values of a column in order of first appearance, limited to the selection
+    def options(self, column, selection=None):
+        selected = _selected(selection)
+        selected.pop(column, None)
+        if not selected:
+            return list(self._single[column])
+
+        cache_key = (column, tuple(sorted(selected.items(), key=lambda item: item[0])))
+        options = self._options.get(cache_key)
+        if options is None:
+            position = self.columns.index(column)
+            checks = [(self.columns.index(name), value) for name, value in selected.items()]
+            options = []
+            seen = set()
+            for key in self._combos:
+                if all(key[i] == value for i, value in checks) and key[position] not in seen:
+                    seen.add(key[position])
+                    options.append(key[position])
+            self._options[cache_key] = options
+        return options
+
+
+# Function to order groupby indices by the first row each group appears on
+def _by_first_row(groups):
+    return dict(sorted(groups.items(), key=lambda item: item[1][0]))
+
+
+def _selected(selection):
+    return {column: value for column, value in (selection or {}).items() if value is not None}
+
+
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+# Function to get the index of a dataset, built once per dataset key and reused afterwards
+def get_index(df, columns, dataset_key=None):
+    if dataset_key is None:
+        return SelectionIndex(df, columns)
+    cache_key = (dataset_key, tuple(columns))
+    with _lock:
+        index = _indexes.get(cache_key)
+        if index is not None:
+            _indexes.move_to_end(cache_key)
+            return index
+    index = SelectionIndex(df, columns)
+    with _lock:
+        _indexes[cache_key] = index
+        while len(_indexes) > INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
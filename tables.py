@@ -0,0 +1,211 @@
+# Column-at-a-time table rendering (Markdown and DOCX) shared by the report generators.
+# Cells are formatted exactly as the old DataFrame.iterrows() loops printed them,
+# but each column is converted in one pass and each table is emitted in bulk.
+# python-docx is only imported when a Word table is first built.
+import datetime
+import re
+import weakref
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+# Rows are turned into XML and parsed in batches of this size, so building a
+# large DOCX table never holds more than one batch of intermediate strings
+DOCX_CHUNK_ROWS = 1000
+
+# Characters python-docx treats specially inside a run, plus those XML cannot hold
+_RUN_SPECIAL = re.compile(r'[\t\r\n]')
+_XML_INVALID = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+
+# Function to find the dtype iterrows() upcasts every row of a frame to
+def _row_dtype(df):
+    dtypes = list(df.dtypes)
+    if dtypes and all(isinstance(dtype, np.dtype) and dtype.kind in 'iuf' for dtype in dtypes):
+        return np.result_type(*dtypes)
+    if len(set(dtypes)) == 1 and isinstance(dtypes[0], np.dtype) and dtypes[0].kind == 'b':
+        return dtypes[0]
+    return np.dtype(object)
+
+
+# Kinds of cell that decide the dtype iterrows() infers for a row of an object frame
+_MISSING, _STR, _DATETIME, _TIMEDELTA, _NAT, _OTHER = range(6)
+
+
+# Function to classify every cell of a column (see _MISSING.._OTHER)
+def _cell_kinds(series):
+    dtype = series.dtype
+    missing = series.isna().to_numpy()
+    if isinstance(dtype, pd.CategoricalDtype):
+        kinds = _cell_kinds(pd.Series(dtype.categories))
+        return np.where(missing, _MISSING, kinds[np.maximum(series.cat.codes.to_numpy(), 0)])
+    if dtype == object:
+        return np.fromiter(map(_object_kind, series.to_numpy()), dtype=np.int8, count=len(series))
+    if isinstance(dtype, pd.StringDtype) or pd.api.types.is_string_dtype(dtype):
+        kind = _STR
+    elif pd.api.types.is_datetime64_any_dtype(dtype):
+        kind = _DATETIME
+    elif pd.api.types.is_timedelta64_dtype(dtype):
+        kind = _TIMEDELTA
+    else:
+        kind = _OTHER
+    return np.where(missing, _NAT if kind in (_DATETIME, _TIMEDELTA) else _MISSING, kind)
+
+
+def _object_kind(value):
+    if value is pd.NaT:
+        return _NAT
+    if isinstance(value, str):
+        return _STR
+    if isinstance(value, (datetime.datetime, np.datetime64)):
+        return _DATETIME
+    if isinstance(value, (datetime.timedelta, np.timedelta64)):
+        return _TIMEDELTA
+    if value is None or value is pd.NA or (isinstance(value, float) and value != value):
+        return _MISSING
+    return _OTHER
+
+
+# The cell kinds of the last frame classified: a table's columns are formatted one after
+# another from the same frame, so they share one classification
+_last_kinds = (None, None)
+
+
+# Function to classify every cell of a frame, one column of kinds per frame column
+def _frame_kinds(df):
+    global _last_kinds
+    ref, kinds = _last_kinds
+    if ref is not None and ref() is df and kinds.shape == df.shape:
+        return kinds
+    kinds = np.column_stack([_cell_kinds(df.iloc[:, i]) for i in range(df.shape[1])])
+    _last_kinds = (weakref.ref(df), kinds)
+    return kinds
+
+
+# Function to give missing cells the value iterrows() prints for them: a row whose other
+# cells are all strings becomes a str Series (missing cells print "nan"), and one whose
+# other cells are all datetimes (or timedeltas) becomes a datetime Series ("NaT")
+def _row_missing_values(df, values):
+    missing = pd.isna(values)
+    if not missing.any():
+        return values
+    kinds = _frame_kinds(df)
+    allowed = {_STR: (_MISSING, _STR), _DATETIME: (_MISSING, _NAT, _DATETIME), _TIMEDELTA: (_MISSING, _NAT, _TIMEDELTA)}
+    values = values.copy()
+    for kind, replacement in ((_STR, np.nan), (_DATETIME, pd.NaT), (_TIMEDELTA, pd.NaT)):
+        rows = np.isin(kinds, allowed[kind]).all(axis=1) & (kinds == kind).any(axis=1)
+        values[rows & missing] = replacement
+    return values
+
+
+# Function to get a column's cells as the values iterrows() would have yielded for them
+def column_values(df, column, default=None):
+    if column not in df.columns:
+        return np.full(len(df), default, dtype=object)
+    dtype = _row_dtype(df)
+    if dtype == object:
+        return _row_missing_values(df, df[column].astype(object).to_numpy())
+    return df[column].to_numpy(dtype=dtype)
+
+
+# Function to format a whole column of cells as strings, optionally with a suffix
+def format_cells(values, suffix=""):
+    cells = list(map(str, values))
+    if suffix:
+        cells = [cell + suffix for cell in cells]
+    return cells
+
+
+# Function to replace the cells of missing values with a placeholder
+def fill_missing(cells, values, placeholder='N/A'):
+    missing = pd.isna(values)
+    return [placeholder if is_missing else cell for cell, is_missing in zip(cells, missing)]
+
+
+# Function to format one column of a frame, optionally replacing missing cells with a placeholder
+def text_cells(df, column, suffix="", placeholder=None, default=None):
+    values = column_values(df, column, default)
+    cells = format_cells(values, suffix)
+    if placeholder is not None:
+        cells = fill_missing(cells, values, placeholder)
+    return cells
+
+
+# Function to compose the "Ranked X in Y by Z" cells, 'N/A' where there is no ranking
+def ranking_cells(df):
+    ranking = column_values(df, 'Ranking')
+    cells = list(map("Ranked {} in {} by {}".format,
+                     ranking, column_values(df, 'Stream'), column_values(df, 'Agency Name')))
+    return fill_missing(cells, ranking)
+
+
+# Function to render already-formatted columns as Markdown table rows in a single join
+def markdown_rows(*columns):
+    template = "| " + " | ".join(["{}"] * len(columns)) + " |\n"
+    return "".join(map(template.format, *columns))
+
+
+# Function to build the run XML python-docx writes for `cell.text = text`
+def _run_xml(text, bold=False):
+    text = _XML_INVALID.sub('', text)
+    rpr = '<w:rPr><w:b/></w:rPr>' if bold else ''
+    if not text:
+        return f'<w:r>{rpr}</w:r>'
+    parts = []
+    position = 0
+    for match in _RUN_SPECIAL.finditer(text + '\n'):
+        chunk = text[position:match.start()]
+        if chunk:
+            space = ' xml:space="preserve"' if len(chunk.strip()) < len(chunk) else ''
+            parts.append(f'<w:t{space}>{escape(chunk)}</w:t>')
+        if match.start() < len(text):
+            parts.append('<w:tab/>' if match.group() == '\t' else '<w:br/>')
+        position = match.end()
+    return f'<w:r>{rpr}{"".join(parts)}</w:r>'
+
+
+# Function to build the XML of one table row
+def _row_xml(cells, widths, bold=False, header=False):
+    trpr = '<w:trPr><w:tblHeader/></w:trPr>' if header else ''
+    tcs = "".join(
+        f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{width}"/></w:tcPr><w:p>{_run_xml(cell, bold)}</w:p></w:tc>'
+        for cell, width in zip(cells, widths)
+    )
+    return f'<w:tr>{trpr}{tcs}</w:tr>'
+
+
+# Function to append rows to a table element, parsing them in batches
+def _append_rows(tbl, rows, widths):
+    batch = []
+    for cells in rows:
+        batch.append(_row_xml(cells, widths))
+        if len(batch) == DOCX_CHUNK_ROWS:
+            _flush_rows(tbl, batch)
+            batch = []
+    if batch:
+        _flush_rows(tbl, batch)
+
+
+def _flush_rows(tbl, batch):
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls
+
+    fragment = parse_xml(f'<w:tbl {nsdecls("w")}>{"".join(batch)}</w:tbl>')
+    tbl.extend(list(fragment))
+
+
+# Function to add a table to a Word document in bulk instead of cell by cell
+#
+# `columns` holds one list of already formatted strings per column. The header can
+# optionally be bold and repeat on every page, and `style` names a table style.
+def add_docx_table(doc, header, columns, bold_header=False, style=None):
+    from docx.oxml.ns import qn
+
+    table = doc.add_table(rows=0, cols=len(header), style=style)
+    tbl = table._tbl
+    widths = [grid_col.get(qn('w:w')) for grid_col in tbl.tblGrid.iterchildren(qn('w:gridCol'))]
+    header_row = _row_xml([str(cell) for cell in header], widths, bold=bold_header, header=bold_header)
+    _flush_rows(tbl, [header_row])
+    _append_rows(tbl, zip(*columns), widths)
+    return table
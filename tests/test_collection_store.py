@@ -0,0 +1,25 @@
+import gc
+
+import pandas as pd
+
+import collection_store
+import registry
+
+
+def test_cached_collection_stores_do_not_keep_datasets_alive():
+    datasets = registry.DatasetRegistry()
+    frame = pd.DataFrame({
+        'Course Name': ['MBA', 'MBA', 'MS'],
+        'Country': ['Canada', 'Germany', 'Canada'],
+        'University Name': ['U1', 'U2', 'U3'],
+    })
+    handle = datasets.acquire(("collection", "sheet-key"), lambda: frame)
+    collection_data_list = [{"sheet_name": "Top", "data": handle.value, "key": "sheet-key", "handle": handle}]
+
+    selected = collection_store.get_store(collection_data_list).select(collection_data_list, 'MBA', 'Canada')
+    assert selected[0]["data"]['University Name'].tolist() == ['U1']
+    assert selected[0]["key"] == "sheet-key|MBA|Canada"
+
+    del handle, collection_data_list, selected
+    gc.collect()
+    assert datasets.stats()["referenced"] == 0
@@ -0,0 +1,43 @@
+import openpyxl
+import pandas as pd
+import pytest
+
+import ingest
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Collection"
+    ws.append(["University Name", "Tuition Fees", "Acceptance Rate", "Notes"])
+    ws.append(["A", 1000, 45.5, None])
+    ws.append([None, None, None, None])          # blank row inside the data
+    ws.append(["C", 2000.0, None, "only notes"])
+    ws.append([None, None, None, "blank in the projected columns"])
+    ws.append([5, 3000, 12.25, ""])
+    ws.append([None, None, None, None])          # trailing blank rows
+    ws.append([None, None, None, None])
+    path = tmp_path / "collection.xlsx"
+    wb.save(path)
+    return str(path)
+
+
+# Function to read a sheet with a fresh cache in the given reader mode
+def read(monkeypatch, tmp_path, mode, path, **kwargs):
+    monkeypatch.setattr(ingest, "READER_MODE", mode)
+    cache = ingest.WorkbookCache(cache_dir=str(tmp_path / f"cache-{mode}"))
+    return cache.read_sheet(path, sheet_name="Collection", **kwargs)
+
+
+@pytest.mark.parametrize("kwargs", [
+    dict(columns=["University Name", "Tuition Fees", "Acceptance Rate"]),
+    dict(exclude=["Notes"], required=["University Name"]),
+    dict(columns=["Notes", "University Name"]),
+])
+def test_stream_and_pandas_readers_return_identical_frames(monkeypatch, tmp_path, workbook, kwargs):
+    parsed = read(monkeypatch, tmp_path, "pandas", workbook, **kwargs)
+    streamed = read(monkeypatch, tmp_path, "stream", workbook, **kwargs)
+    pd.testing.assert_frame_equal(streamed, parsed)
+    assert parsed["University Name"].isna().tolist() == [False, True, False, True, False]
+    assert streamed["University Name"].map(type).tolist() == parsed["University Name"].map(type).tolist()
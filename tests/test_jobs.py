@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+import jobs
+
+
+@pytest.fixture
+def queue():
+    queue = jobs.JobQueue(max_workers=1, max_pending=1)
+    yield queue
+    queue._pool.shutdown(wait=True, cancel_futures=True)
+
+
+# Function to make a job body that signals when it starts and then waits at checkpoints until released
+def blocking(started, release):
+    def run(job):
+        started.set()
+        while not release.wait(0.01):
+            job.report(0.5)
+        return job.key
+    return run
+
+
+def test_identical_submissions_share_one_job(queue):
+    started, release = threading.Event(), threading.Event()
+    first = queue.submit("report", blocking(started, release))
+    second = queue.submit("report", blocking(started, release))
+    assert first is second
+    assert first.requesters == 2
+
+    release.set()
+    first.future.result(timeout=5)
+    assert first.state == jobs.DONE
+    assert first.result == "report"
+
+
+def test_job_is_cancelled_once_every_requester_abandons_it(queue):
+    started, release = threading.Event(), threading.Event()
+    job = queue.submit("report", blocking(started, release))
+    queue.submit("report", blocking(started, release))
+    assert started.wait(5)
+
+    queue.abandon(job)
+    assert not job._cancelled.is_set()
+    queue.abandon(job)
+    job.future.result(timeout=5)
+    assert job.state == jobs.CANCELLED
+
+    # A new request for the same key starts a fresh job
+    release.set()
+    again = queue.submit("report", lambda job: "fresh")
+    assert again is not job
+    again.future.result(timeout=5)
+    assert again.result == "fresh"
+
+
+def test_abandoned_queued_job_is_cancelled_without_running(queue):
+    started, release = threading.Event(), threading.Event()
+    running = queue.submit("first", blocking(started, release))
+    assert started.wait(5)
+    ran = []
+    waiting = queue.submit("second", ran.append)
+
+    queue.abandon(waiting)
+    assert waiting.state == jobs.CANCELLED
+    release.set()
+    running.future.result(timeout=5)
+    assert not ran
+
+
+def test_submissions_beyond_the_pending_limit_are_refused(queue):
+    started, release = threading.Event(), threading.Event()
+    queue.submit("first", blocking(started, release))
+    assert started.wait(5)
+    queue.submit("second", lambda job: None)
+
+    with pytest.raises(jobs.QueueFull):
+        queue.submit("third", lambda job: None)
+    # Joining a job that is already in flight is still allowed
+    assert queue.submit("second", lambda job: None).requesters == 2
+    release.set()
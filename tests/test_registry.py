@@ -0,0 +1,47 @@
+import gc
+
+import registry
+
+
+def test_sessions_share_one_load_and_release_it_with_their_handles():
+    datasets = registry.DatasetRegistry(max_bytes=1000, sizeof=len)
+    loads = []
+
+    def load():
+        loads.append(1)
+        return b"x" * 10
+
+    first = datasets.acquire("a", load)
+    second = datasets.acquire("a", load)
+    assert len(loads) == 1
+    assert second.value is first.value
+    assert datasets.stats()["handles"] == 2
+
+    # A handle the caller already holds is reused without counting a hit
+    assert datasets.acquire("a", load, held=[None, first]) is first
+    assert datasets.stats()["hits"] == 1
+
+    del first
+    gc.collect()
+    assert datasets.stats()["handles"] == 1
+    del second
+    gc.collect()
+    assert datasets.stats()["referenced"] == 0
+
+
+def test_only_unreferenced_datasets_are_evicted_over_budget():
+    datasets = registry.DatasetRegistry(max_bytes=100, sizeof=len)
+    a = datasets.acquire("a", lambda: b"a" * 60)
+    b = datasets.acquire("b", lambda: b"b" * 60)
+    # Both are in use, so the registry goes over budget rather than evicting either
+    assert datasets.stats()["datasets"] == 2
+    assert datasets.stats()["evictions"] == 0
+
+    del a
+    gc.collect()
+    stats = datasets.stats()
+    assert stats["datasets"] == 1
+    assert stats["evictions"] == 1
+    assert stats["nbytes"] == 60
+    assert datasets.acquire("b", lambda: b"") is not b
+
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import compact
+import gyandhantemp
+
+
+# Reference renderers: the row-by-row loops the column-at-a-time tables must reproduce byte for byte
+def reference_collection(sheet_name, data):
+    content = f"## {sheet_name}\n\n\n\n"
+    content += "| **University Name** | **Tuition Fees (INR)** | **Acceptance Rate (%)** | **Application Link** | **Ranking** |\n"
+    content += "|---------------------|------------------------|------------------------|----------------------|-------------|\n"
+    for _, row in data.iterrows():
+        ranking = f"Ranked {row['Ranking']} in {row['Stream']} by {row['Agency Name']}" if pd.notna(row['Ranking']) else 'N/A'
+        content += (f"| {row['University Name']} | {row['Tuition Fees']} | {row['Acceptance Rate']}% | "
+                    f"[Apply Here]({row['Application Link']}) | {ranking} |\n")
+    return content
+
+
+def reference_deadlines(deadlines_data):
+    content = "## Important Deadlines\n"
+    if deadlines_data is not None and not deadlines_data.empty:
+        content += "| **Event** | **Date** | **Notes** |\n"
+        content += "|----------|----------|-----------|\n"
+        for _, row in deadlines_data.iterrows():
+            content += f"| {row['Event']} | {row['Date']} | {row.get('Notes', 'N/A')} |\n"
+    else:
+        content += "No important deadlines available.\n\n"
+    return content
+
+
+def collection_frame():
+    return pd.DataFrame({
+        'Course Name': ['MBA', 'MBA', 'MBA', 'MBA', 'MBA'],
+        'Country': ['Canada', 'Canada', 'Canada', 'Canada', 'Canada'],
+        'Collection Name': ['Top', 'Top', 'Top', 'Top', 'Top'],
+        'University Name': ['A', None, 'C', 5, 'E'],
+        'Tuition Fees': [1000, np.nan, 250000, 3000, 12],
+        'Acceptance Rate': [45.5, 0.1, np.nan, 33.333333333333336, 7.0],
+        'Application Link': ['https://a.edu', np.nan, 'https://c.edu', 'https://d.edu', None],
+        'Ranking': [1.0, 12.0, np.nan, 250.0, 3.0],
+        'Agency Name': ['QS', 'THE', 'QS', None, 'QS'],
+        'Stream': ['Business', 'Business', 'Engineering', 'Business', np.nan],
+    })
+
+
+# Rows whose cells are all text or missing: iterrows prints their missing cells as "nan"
+def text_rows_collection_frame():
+    data = collection_frame()
+    data.loc[1, ['Tuition Fees', 'Acceptance Rate', 'Ranking']] = np.nan
+    data.loc[4, ['University Name', 'Tuition Fees', 'Acceptance Rate', 'Ranking']] = [None, np.nan, np.nan, np.nan]
+    return data
+
+
+# Every column numeric: iterrows upcasts each row to one dtype, so ints print as floats
+def numeric_collection_frame():
+    return pd.DataFrame({
+        'University Name': [101, 102, 103],
+        'Tuition Fees': [1000, 2000, 3000],
+        'Acceptance Rate': [45.5, np.nan, 12.0],
+        'Application Link': [1, 2, 3],
+        'Ranking': [5, 6, 7],
+        'Agency Name': [1, 1, 2],
+        'Stream': [3, 3, 4],
+    })
+
+
+def deadlines_frame():
+    return pd.DataFrame({
+        'Event': ['Apply', 'Visa', None],
+        'Date': pd.to_datetime(['2025-01-01', None, '2025-03-01']),
+        'Notes': ['early', np.nan, 'late'],
+    })
+
+
+@pytest.mark.parametrize("make_frame", [collection_frame, text_rows_collection_frame, numeric_collection_frame])
+@pytest.mark.parametrize("normalize", [False, True])
+def test_collection_section_matches_row_by_row_rendering(make_frame, normalize):
+    raw = make_frame()
+    data = compact.normalize(raw, gyandhantemp.COLLECTION_DTYPES)[0] if normalize else raw
+    rendered = gyandhantemp.render_collection_section({"sheet_name": "Top Colleges", "data": data})
+    assert rendered == reference_collection("Top Colleges", raw)
+
+
+@pytest.mark.parametrize("make_frame", [
+    deadlines_frame,
+    lambda: deadlines_frame().drop(columns=['Notes']),
+    lambda: deadlines_frame().iloc[:0],
+])
+@pytest.mark.parametrize("normalize", [False, True])
+def test_deadlines_section_matches_row_by_row_rendering(make_frame, normalize):
+    raw = make_frame()
+    spec = {'Event': 'category', 'Notes': 'string'}
+    data = compact.normalize(raw, {column: kind for column, kind in spec.items() if column in raw})[0] if normalize else raw
+    assert gyandhantemp.render_deadlines_section(data) == reference_deadlines(raw)